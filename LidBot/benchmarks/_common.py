@@ -0,0 +1,44 @@
+"""Helpers shared by the benchmark scripts: importing the bot runtime and timing."""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import Callable
+
+ROOT = Path(__file__).resolve().parents[1]
+
+SAMPLE_MESSAGES = [
+    "Нужна машина в аренду на неделю, кто может подсказать?",
+    "Ищу авто напрокат в Дубае с 1 по 10 число",
+    "Need a car for rent for a week. Who can help?",
+    "Сдаю авто в аренду, звоните в whatsapp",
+    "Всем привет! Подскажите, где лучше поменять валюту в Марине?",
+    "Looking for a nice studio in JVC, budget 5k per month",
+    "Продам детские игрушки, почти новые, самовывоз из Дейры",
+    "Еду из Шарджи в Дубай завтра утром, могу забрать попутчиков",
+    "Хочу взять машину в аренду на месяц, желательно кроссовер",
+    "Good morning everyone, any recommendations for a dentist near Business Bay?",
+]
+
+
+def bench_parser(description: str) -> argparse.ArgumentParser:
+    return argparse.ArgumentParser(description=description)
+
+
+def use_bot() -> Path:
+    """Put LidBot/ on sys.path so `import bot...` resolves to the shared runtime; returns that directory."""
+    sys.path.insert(0, str(ROOT))
+    return ROOT
+
+
+def rate(func: Callable[[], None], count: int, min_seconds: float = 0.5) -> float:
+    """Call `func` (which handles `count` items) until `min_seconds` pass; return items/sec."""
+    loops = 0
+    start = time.perf_counter()
+    while True:
+        func()
+        loops += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_seconds:
+            return loops * count / elapsed
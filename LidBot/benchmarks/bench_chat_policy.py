@@ -0,0 +1,90 @@
+"""
+ChatPolicy on simulated traffic: `--chats` chats with Zipf-like message
+rates, of which `--yielding` share post a lead now and then while the rest
+never do. Every admitted message runs through passes_filters. Reports
+messages checked, filter time and leads found with the policy off and on,
+the cost of admit() per message and ChatStats memory per chat.
+
+    python benchmarks/bench_chat_policy.py --chats 5000 --messages 300000
+"""
+
+import random
+import time
+import tracemalloc
+
+from _common import SAMPLE_MESSAGES, bench_parser, use_bot
+
+
+def main() -> None:
+    parser = bench_parser(__doc__)
+    parser.add_argument("--chats", type=int, default=5000)
+    parser.add_argument("--messages", type=int, default=300000)
+    parser.add_argument("--yielding", type=float, default=0.05, help="share of chats that ever post a lead")
+    parser.add_argument("--lead-rate", type=float, default=0.02, help="share of a yielding chat's messages that are leads")
+    parser.add_argument("--quiet-after", type=int, default=500)
+    parser.add_argument("--sample-every", type=int, default=10)
+    parser.add_argument("--probe-every", type=int, default=100)
+    parser.add_argument("--window", type=int, default=3)
+    args = parser.parse_args()
+    use_bot()
+
+    from bot.utils import filters
+    from bot.utils.chat_stats import ChatPolicy, ChatStats
+
+    leads = [text for text in SAMPLE_MESSAGES if filters.passes_filters(text, args.window)]
+    noise = [text for text in SAMPLE_MESSAGES if not filters.passes_filters(text, args.window)]
+    rng = random.Random(1)
+    chat_ids = [-1000000000000 - index for index in range(args.chats)]
+    weights = [1 / (rank + 1) ** 1.1 for rank in range(args.chats)]
+    rng.shuffle(weights)
+    yielding = set(rng.sample(chat_ids, max(1, int(args.chats * args.yielding))))
+    traffic = []
+    for chat_id in rng.choices(chat_ids, weights, k=args.messages):
+        lead = chat_id in yielding and rng.random() < args.lead_rate
+        traffic.append((chat_id, rng.choice(leads) if lead else rng.choice(noise)))
+    posted = sum(filters.passes_filters(text, args.window) for _, text in traffic)
+
+    print(
+        f"{args.messages} messages from {args.chats} chats, {len(yielding)} ever yield a lead, {posted} leads posted; "
+        f"quiet after {args.quiet_after}, 1 in {args.sample_every}, then 1 in {args.probe_every}"
+    )
+    print(f"{'':>8} {'checked':>9} {'filter s':>9} {'found':>7} {'missed':>7} {'sampled':>8} {'muted':>6}")
+    for name, enabled in (("off", False), ("on", True)):
+        policy = ChatPolicy(ChatStats(), enabled, args.quiet_after, args.sample_every, args.probe_every)
+        checked = found = 0
+        seconds = 0.0
+        for chat_id, text in traffic:
+            if not policy.admit(chat_id):
+                continue
+            checked += 1
+            started = time.perf_counter()
+            ok = filters.passes_filters(text, args.window)
+            seconds += time.perf_counter() - started
+            if ok:
+                found += 1
+                policy.passed(chat_id)
+        states = policy.summary()
+        print(
+            f"{name:>8} {checked:>9,} {seconds:>9.2f} {found:>7,} {posted - found:>7,} "
+            f"{states['sampled']:>8,} {states['muted']:>6,}"
+        )
+
+    policy = ChatPolicy(ChatStats(), True, args.quiet_after, args.sample_every, args.probe_every)
+    ids = [chat_id for chat_id, _ in traffic]
+    started = time.perf_counter()
+    for chat_id in ids:
+        policy.admit(chat_id)
+    admit_ns = (time.perf_counter() - started) / len(ids) * 1e9
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    stats = ChatStats()
+    for chat_id in chat_ids:
+        stats.row(chat_id)
+    per_chat = (tracemalloc.get_traced_memory()[0] - before) / len(chat_ids)
+    tracemalloc.stop()
+    print(f"admit(): {admit_ns:.0f} ns/message, ChatStats: {per_chat:.0f} B/chat")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+passes_filters one message at a time versus passes_filters_batch, each
+starting from an empty lemma cache, on a mix of sample messages and long
+lead-like texts. Reports lemma lookups per path and fails if the verdicts differ.
+
+    python benchmarks/bench_filter_batch.py --messages 5000
+"""
+
+import random
+import time
+
+from _common import SAMPLE_MESSAGES, bench_parser, use_bot
+from bench_filter_pool import long_message
+
+
+def main() -> None:
+    parser = bench_parser(__doc__)
+    parser.add_argument("--messages", type=int, default=5000)
+    parser.add_argument("--words", type=int, default=40, help="tokens per generated message")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--window", type=int, default=3)
+    args = parser.parse_args()
+    use_bot()
+
+    from bot.utils import filters
+
+    rng = random.Random(1)
+    texts = [
+        rng.choice(SAMPLE_MESSAGES) if rng.random() < 0.7 else long_message(rng, args.words)
+        for _ in range(args.messages)
+    ]
+
+    calls = 0
+    safe_lemma = filters.safe_lemma
+
+    def counted_lemma(word: str) -> str:
+        nonlocal calls
+        calls += 1
+        return safe_lemma(word)
+
+    filters.safe_lemma = counted_lemma
+    filters.get_morph()
+
+    filters.configure_lemma_cache(20000, None)
+    start = time.perf_counter()
+    single = [filters.passes_filters(text, args.window) for text in texts]
+    single_rate = len(texts) / (time.perf_counter() - start)
+    single_calls, calls = calls, 0
+
+    filters.configure_lemma_cache(20000, None)
+    start = time.perf_counter()
+    batched = []
+    for i in range(0, len(texts), args.batch_size):
+        batched.extend(filters.passes_filters_batch(texts[i:i + args.batch_size], args.window))
+    batch_rate = len(texts) / (time.perf_counter() - start)
+
+    mismatches = sum(a != b for a, b in zip(single, batched))
+    print(f"{args.messages} messages, batch {args.batch_size}, {sum(single)} accepted")
+    print(f"{'single':>8} {single_rate:>10,.0f} msg/s  {single_calls:>8,} lemma lookups")
+    print(f"{'batch':>8} {batch_rate:>10,.0f} msg/s  {calls:>8,} lemma lookups  ({batch_rate / single_rate:.2f}x)")
+    print(f"verdict mismatches: {mismatches}")
+    if mismatches:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Filter throughput: inline passes_filters versus FilterPool with 1, 2, 4 and 8
+worker processes, on long messages with a mostly unseen vocabulary (the
+worst case for lemmatization).
+
+    python benchmarks/bench_filter_pool.py --messages 2000
+"""
+
+import asyncio
+import os
+import random
+import time
+
+from _common import SAMPLE_MESSAGES, bench_parser, use_bot
+
+CYRILLIC = "абвгдежзийклмнопрстуфхцчшщыэюя"
+ENDINGS = ["ами", "ого", "ему", "ая", "ые", "ов", "ом", "ах", "ий", "ую"]
+
+
+def long_message(rng: random.Random, words: int) -> str:
+    tokens = []
+    for _ in range(words):
+        if rng.random() < 0.2:
+            tokens.append(rng.choice(rng.choice(SAMPLE_MESSAGES).split()))
+        else:
+            stem = "".join(rng.choice(CYRILLIC) for _ in range(rng.randint(3, 8)))
+            tokens.append(stem + rng.choice(ENDINGS))
+    # Keep the message past the quick pre-checks so every one gets lemmatized.
+    return "Нужна машина " + " ".join(tokens)
+
+
+async def run_pool(pool_cls, processes: int, texts, batch_size: int, window: int) -> float:
+    pool = pool_cls(processes)
+    try:
+        await pool.passes_filters(["warm up"], window)
+        batches = [texts[i:i + batch_size] for i in range(0, len(texts), batch_size)]
+        start = time.perf_counter()
+        await asyncio.gather(*(pool.passes_filters(batch, window) for batch in batches))
+        return len(texts) / (time.perf_counter() - start)
+    finally:
+        pool.shutdown(wait=True)
+
+
+def main() -> None:
+    parser = bench_parser(__doc__)
+    parser.add_argument("--messages", type=int, default=2000)
+    parser.add_argument("--words", type=int, default=120, help="tokens per message")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--window", type=int, default=3)
+    parser.add_argument("--processes", default="1,2,4,8")
+    args = parser.parse_args()
+    use_bot()
+
+    from bot.utils import filters
+    from bot.utils.filter_pool import FilterPool
+
+    rng = random.Random(1)
+    texts = [long_message(rng, args.words) for _ in range(args.messages)]
+    print(f"{args.messages} messages x {args.words} tokens, batch {args.batch_size}, {os.cpu_count()} CPUs")
+
+    # Fresh vocabulary for the inline run too: time it on a separate sample
+    # so its lemma cache starts as cold as the workers' caches.
+    inline_texts = [long_message(rng, args.words) for _ in range(args.messages)]
+    start = time.perf_counter()
+    for text in inline_texts:
+        filters.passes_filters(text, args.window)
+    inline = args.messages / (time.perf_counter() - start)
+    print(f"{'inline':>10} {inline:>10,.0f} msg/s")
+
+    for processes in (int(p) for p in args.processes.split(",")):
+        pooled = asyncio.run(run_pool(FilterPool, processes, texts, args.batch_size, args.window))
+        print(f"{processes:>4} procs {pooled:>10,.0f} msg/s  ({pooled / inline:.2f}x inline)")
+
+
+if __name__ == "__main__":
+    main()
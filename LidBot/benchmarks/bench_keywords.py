@@ -0,0 +1,59 @@
+"""
+Keyword scan throughput: the per-category `any(kw in text ...)` loops versus the
+single-pass KeywordMatcher, as the keyword lists grow.
+
+    python benchmarks/bench_keywords.py
+"""
+
+import random
+import string
+
+from _common import SAMPLE_MESSAGES, rate, bench_parser, use_bot
+
+ALPHABET = string.ascii_lowercase + "абвгдеёжзийклмнопрстуфхцчшщъыьэюя"
+
+
+def synthetic_keywords(count: int, rng: random.Random):
+    return ["".join(rng.choice(ALPHABET) for _ in range(rng.randint(4, 12))) for _ in range(count)]
+
+
+def main() -> None:
+    parser = bench_parser(__doc__)
+    parser.add_argument("--sizes", default="0,100,500,2000,8000", help="extra keywords per run")
+    args = parser.parse_args()
+    use_bot()
+
+    from bot.utils import filters
+    from bot.utils.matcher import KeywordMatcher
+
+    rng = random.Random(42)
+    texts = [message.lower() for message in SAMPLE_MESSAGES]
+    base = filters.current_rules().keywords
+
+    print(f"{'keywords':>9} {'loops msg/s':>13} {'matcher msg/s':>14} {'speedup':>8}")
+    for extra in (int(size) for size in args.sizes.split(",")):
+        padding = synthetic_keywords(extra, rng)
+        categories = {name: list(words) for name, words in base.items()}
+        for i, word in enumerate(padding):
+            categories[list(categories)[i % len(categories)]].append(word)
+        lists = list(categories.values())
+        matcher = KeywordMatcher(categories)
+
+        def loops():
+            for text in texts:
+                [any(keyword in text for keyword in words) for words in lists]
+
+        def automaton():
+            for text in texts:
+                matcher.scan(text)
+
+        loop_rate = rate(loops, len(texts))
+        matcher_rate = rate(automaton, len(texts))
+        print(
+            f"{matcher.keyword_count:>9} {loop_rate:>13,.0f} {matcher_rate:>14,.0f} "
+            f"{matcher_rate / loop_rate:>7.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Lemma cache warm start: lemmatize a vocabulary with a cold in-memory cache,
+then "restart" on top of the on-disk tier and compare warm-up time, lookup
+time and hit/miss/eviction counters.
+
+    python benchmarks/bench_lemma_cache.py --words 30000
+"""
+
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from _common import bench_parser, use_bot
+
+CYRILLIC = "абвгдежзийклмнопрстуфхцчшщыэюя"
+ENDINGS = ["", "а", "ы", "ой", "ами", "ого", "ему", "ая", "ые", "ов", "ом", "ах"]
+
+
+def vocabulary(count: int, rng: random.Random):
+    words = set()
+    while len(words) < count:
+        stem = "".join(rng.choice(CYRILLIC) for _ in range(rng.randint(3, 8)))
+        words.add(stem + rng.choice(ENDINGS))
+    return sorted(words)
+
+
+def lemmatize_all(filters, words) -> float:
+    start = time.perf_counter()
+    for word in words:
+        filters.safe_lemma(word)
+    return time.perf_counter() - start
+
+
+def report(label: str, seconds: float, cache) -> None:
+    stats = cache.stats()
+    print(
+        f"{label:<22} {seconds:>7.2f} s  hit rate {stats['hit_rate']:>6.1%}  "
+        f"hits {stats['hits']:>6}  disk {stats['disk_hits']:>6}  misses {stats['misses']:>6}  "
+        f"evictions {stats['evictions']:>6}"
+    )
+
+
+def main() -> None:
+    parser = bench_parser(__doc__)
+    parser.add_argument("--words", type=int, default=30000)
+    parser.add_argument("--cache-size", type=int, default=20000)
+    args = parser.parse_args()
+    use_bot()
+
+    from bot.utils import filters
+
+    words = vocabulary(args.words, random.Random(3))
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "lemmas.sqlite3"
+
+        filters.configure_lemma_cache(args.cache_size)
+        report("memory only, cold", lemmatize_all(filters, words), filters.LEMMA_CACHE)
+
+        filters.configure_lemma_cache(args.cache_size, path)
+        report("disk tier, first run", lemmatize_all(filters, words), filters.LEMMA_CACHE)
+        filters.LEMMA_CACHE.close()
+
+        cache = filters.configure_lemma_cache(args.cache_size, path)
+        print(f"{'restart warm-up':<22} {cache.warm_seconds:>7.2f} s  {cache.warm_entries} entries preloaded")
+        report("disk tier, restarted", lemmatize_all(filters, words), filters.LEMMA_CACHE)
+        filters.LEMMA_CACHE.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Outbox write throughput: `--producers` concurrent senders each persist
+leads one at a time (like deliver workers under a burst), first with group
+commit, then with one transaction and fsync per lead. Each run starts from
+an empty file in `--dir` (defaults to a temp dir; point it at the disk the
+bot uses, fsync cost depends on it).
+
+    python benchmarks/bench_outbox.py --leads 2000 --producers 16
+"""
+
+import asyncio
+import tempfile
+import time
+from pathlib import Path
+
+from _common import bench_parser, use_bot
+
+LEAD = "🚗 <b>New lead</b>\nChat: Dubai rent\n\nNeed a car for rent for a week, budget 3000 AED\n\n🔗 https://t.me/chat/123"
+
+
+async def run_once(outbox_cls, path: Path, leads: int, producers: int, group_commit: bool):
+    outbox = outbox_cls(path, group_commit=group_commit)
+    await outbox.open()
+    per_producer = leads // producers
+
+    async def producer(index: int) -> None:
+        for i in range(per_producer):
+            await outbox.add([f"{LEAD} #{index}-{i}"])
+
+    start = time.perf_counter()
+    await asyncio.gather(*(producer(index) for index in range(producers)))
+    elapsed = time.perf_counter() - start
+    stats = outbox.stats()
+    await outbox.close()
+    return elapsed, stats
+
+
+def main() -> None:
+    parser = bench_parser(__doc__)
+    parser.add_argument("--leads", type=int, default=2000)
+    parser.add_argument("--producers", type=int, default=16)
+    parser.add_argument("--dir", type=Path, help="where to create the outbox files")
+    args = parser.parse_args()
+    use_bot()
+
+    from bot.utils.outbox import Outbox
+
+    directory = args.dir or Path(tempfile.mkdtemp(prefix="lidbot-outbox-"))
+    print(f"{args.leads} leads from {args.producers} producers, files in {directory}")
+    results = {}
+    for label, group_commit in (("group", True), ("per-lead", False)):
+        path = directory / f"outbox-{label}.sqlite3"
+        for suffix in ("", "-wal", "-shm"):
+            Path(f"{path}{suffix}").unlink(missing_ok=True)
+        elapsed, stats = asyncio.run(run_once(Outbox, path, args.leads, args.producers, group_commit))
+        results[label] = stats["added"] / elapsed
+        print(
+            f"{label:>9} {results[label]:>9,.0f} leads/s  {stats['commits']:>6} commits  "
+            f"{stats['added'] / stats['commits']:>6.1f} leads/commit"
+        )
+    print(f"group commit speedup: {results['group'] / results['per-lead']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
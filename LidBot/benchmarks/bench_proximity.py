@@ -0,0 +1,110 @@
+"""
+The lemma checks of the filter on lemma lists: the previous seller scan
+plus car/intent proximity (index lists and a two-pointer walk, called
+twice with the sets swapped) against one ProximityEngine tag + match, with
+one rule and with several rules at once. Keywords are drawn from the
+car, intent and rental lemmas only, since messages with offer words are
+rejected before the proximity check. Fails if any verdict differs.
+
+    python benchmarks/bench_proximity.py --messages 20000 --words 40
+"""
+
+import random
+from typing import List
+
+from _common import SAMPLE_MESSAGES, rate, bench_parser, use_bot
+
+
+def old_has_proximity(lemmas: List[str], left_set: set, right_set: set, window: int) -> bool:
+    left_idx = [i for i, token in enumerate(lemmas) if token in left_set]
+    if not left_idx:
+        return False
+    right_idx = [i for i, token in enumerate(lemmas) if token in right_set]
+    if not right_idx:
+        return False
+    j = 0
+    for i in left_idx:
+        while j < len(right_idx) and right_idx[j] < i - window:
+            j += 1
+        if j < len(right_idx) and abs(right_idx[j] - i) <= window:
+            return True
+    return False
+
+
+def main() -> None:
+    parser = bench_parser(__doc__)
+    parser.add_argument("--messages", type=int, default=20000)
+    parser.add_argument("--words", type=int, default=40, help="lemmas per generated message")
+    parser.add_argument("--window", type=int, default=3)
+    parser.add_argument("--density", type=float, default=0.05, help="share of lemmas that are keywords")
+    args = parser.parse_args()
+    use_bot()
+
+    from bot.utils import filters
+    from bot.utils.proximity import ProximityEngine, ProximityRule
+
+    rng = random.Random(1)
+    plan = filters.current_rules()
+    car, intent, offer, rental = (plan.lemmas[name] for name in ("car", "intent", "offer", "rental"))
+    categorized = car | intent | offer | rental
+    filler = sorted(
+        {filters.safe_lemma(token) for text in SAMPLE_MESSAGES for token in filters.tokenize(text.lower())} - categorized
+    )
+    keywords = sorted(car | intent | rental)
+    messages = [
+        [rng.choice(keywords) if rng.random() < args.density else rng.choice(filler) for _ in range(args.words)]
+        for _ in range(args.messages)
+    ]
+    window = args.window
+
+    def old_checks():
+        return [
+            (
+                any(lemma in offer for lemma in lemmas),
+                old_has_proximity(lemmas, car, intent, window) or old_has_proximity(lemmas, intent, car, window),
+            )
+            for lemmas in messages
+        ]
+
+    engine = plan.proximity
+    offer_bit, client = engine.bit("offer"), engine.rule_bit("client")
+
+    def engine_checks():
+        verdicts = []
+        for lemmas in messages:
+            present, matched = engine.scan(lemmas, window)
+            verdicts.append((bool(present & offer_bit), bool(matched & client)))
+        return verdicts
+
+    several = ProximityEngine(
+        {"car": car, "intent": intent, "rental": rental},
+        [
+            ProximityRule("client", "car", "intent"),
+            ProximityRule("rent_car", "rental", "car", 2),
+            ProximityRule("rent_intent", "rental", "intent", 5),
+        ],
+    )
+
+    def several_checks():
+        for lemmas in messages:
+            several.scan(lemmas, window)
+
+    old_rate = rate(old_checks, len(messages))
+    new_rate = rate(engine_checks, len(messages))
+    several_rate = rate(several_checks, len(messages))
+    old, new = old_checks(), engine_checks()
+    mismatches = sum(a != b for a, b in zip(old, new))
+    print(
+        f"{args.messages} messages of {args.words} lemmas, window {window}, "
+        f"{sum(seller for seller, _ in old)} with offer words, {sum(near for _, near in old)} with car near intent"
+    )
+    print(f"{'old x2':>12} {old_rate:>10,.0f} msg/s")
+    print(f"{'engine':>12} {new_rate:>10,.0f} msg/s  ({new_rate / old_rate:.2f}x)")
+    print(f"{'3 rules':>12} {several_rate:>10,.0f} msg/s  ({several_rate / old_rate:.2f}x)")
+    print(f"verdict mismatches: {mismatches}")
+    if mismatches:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
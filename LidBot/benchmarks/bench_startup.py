@@ -0,0 +1,82 @@
+"""
+Startup cost of `bot.utils.filters`: import time and peak RSS without a lemma
+snapshot, with one, and in snapshot-only mode. Each case runs in a fresh
+interpreter; a snapshot is built into a temp dir first.
+
+    python benchmarks/bench_startup.py
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+from _common import SAMPLE_MESSAGES, bench_parser, use_bot
+
+PROBE = """
+import json, resource, sys, time
+start = time.perf_counter()
+from bot.utils import filters
+imported = time.perf_counter() - start
+rss_import = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+start = time.perf_counter()
+for text in json.loads(sys.argv[1]):
+    filters.passes_filters(text, 3)
+first_filter = time.perf_counter() - start
+print(json.dumps({
+    "import": imported,
+    "rss_import": rss_import,
+    "first_filter": first_filter,
+    "rss_filter": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    "morph_loaded": "pymorphy3" in sys.modules,
+}))
+"""
+
+
+def probe(root: Path, env: dict) -> dict:
+    out = subprocess.run(
+        [sys.executable, "-c", PROBE, json.dumps(SAMPLE_MESSAGES)],
+        cwd=root,
+        env={**os.environ, **env},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(out.stdout)
+
+
+def main() -> None:
+    parser = bench_parser(__doc__)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+    root = use_bot()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        snapshot = Path(tmp) / "lemmas.snap"
+        vocab = Path(tmp) / "vocab.txt"
+        vocab.write_text("\n".join(SAMPLE_MESSAGES), encoding="utf-8")
+        subprocess.run(
+            [sys.executable, "-m", "bot.utils.lemma_snapshot", "-o", str(snapshot), "--vocab", str(vocab)],
+            cwd=root,
+            check=True,
+        )
+        cases = {
+            "no snapshot": {"LEMMA_SNAPSHOT_FILE": str(Path(tmp) / "missing.snap")},
+            "snapshot": {"LEMMA_SNAPSHOT_FILE": str(snapshot)},
+            "snapshot-only": {"LEMMA_SNAPSHOT_FILE": str(snapshot), "LEMMA_SNAPSHOT_ONLY": "1"},
+        }
+        print(f"{'case':<14} {'import':>9} {'RSS':>8} {'+filter':>9} {'RSS':>8}  morph")
+        for name, env in cases.items():
+            runs = [probe(root, env) for _ in range(args.runs)]
+            best = min(runs, key=lambda r: r["import"])
+            print(
+                f"{name:<14} {best['import'] * 1000:>7.0f}ms {best['rss_import'] / 1024:>6.0f}MB "
+                f"{best['first_filter'] * 1000:>7.1f}ms {best['rss_filter'] / 1024:>6.0f}MB  "
+                f"{'loaded' if best['morph_loaded'] else 'never'}"
+            )
+
+
+if __name__ == "__main__":
+    main()
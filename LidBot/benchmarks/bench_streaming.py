@@ -0,0 +1,131 @@
+"""
+The lemma stage on long reposts, with a warm lemma cache: building the
+full token and lemma lists before checking them, versus streaming tokens
+into the proximity engine and stopping once the lemma rules are settled,
+with and without a MAX_SCAN_CHARS cap. Half the messages are sellers
+whose offer word comes first, half are requests padded with made-up
+words. Reports throughput, lemmas looked up and peak memory per message
+and of the lemma stage alone (tracemalloc), and fails if the uncapped
+verdicts differ.
+
+    python benchmarks/bench_streaming.py --messages 1000 --words 600
+"""
+
+import random
+import time
+import tracemalloc
+from typing import List
+
+from _common import bench_parser, use_bot
+from bench_filter_pool import CYRILLIC, ENDINGS
+
+SELLER = "Сдаю авто, аренда на любой срок, "
+CLIENT = "Нужна машина, аренда на неделю, "
+
+
+def vocabulary(rng: random.Random, matcher, size: int = 20000) -> List[str]:
+    """Made-up words that contain no keyword, so every repost reaches the lemma stage."""
+    words = ("".join(rng.choice(CYRILLIC) for _ in range(rng.randint(3, 8))) + rng.choice(ENDINGS) for _ in range(size))
+    return [word for word in words if not matcher.scan(word)]
+
+
+def repost(rng: random.Random, words: List[str], count: int) -> str:
+    return (SELLER if rng.random() < 0.5 else CLIENT) + " ".join(rng.choice(words) for _ in range(count))
+
+
+def main() -> None:
+    parser = bench_parser(__doc__)
+    parser.add_argument("--messages", type=int, default=1000)
+    parser.add_argument("--words", type=int, default=600, help="filler words per message")
+    parser.add_argument("--window", type=int, default=3)
+    parser.add_argument("--max-scan", type=int, default=2000, help="MAX_SCAN_CHARS for the capped run")
+    args = parser.parse_args()
+    use_bot()
+
+    from bot.utils import filters
+
+    plan = filters.current_rules()
+    rng = random.Random(1)
+    words = vocabulary(rng, plan.matcher)
+    texts = [repost(rng, words, args.words) for _ in range(args.messages)]
+    window = args.window
+
+    calls = 0
+    safe_lemma = filters.safe_lemma
+
+    def counted_lemma(word: str) -> str:
+        nonlocal calls
+        calls += 1
+        return safe_lemma(word)
+
+    # Every word lemmatized up front: pymorphy's cost per new word is the same for every path
+    filters.configure_lemma_cache(len(words) + 1000, None)
+    for text in (SELLER, CLIENT, " ".join(words)):
+        for token in filters.tokenize(text.lower()):
+            filters.safe_lemma(token)
+    filters.safe_lemma = counted_lemma
+
+    def lists_stage(message) -> bool:
+        lemmas = [filters.safe_lemma(token) for token in filters.tokenize(message.lower)]
+        message.categories, message.matched = plan.proximity.scan(lemmas, window)
+        return any(stage.reject(message) for stage in plan.lemma_stages.stages[1:])
+
+    def stream_stage(message) -> bool:
+        return plan.lemma_stages.rejects(message)
+
+    def checker(lemma_stage):
+        def check(text: str) -> bool:
+            message = filters._Message(text, window, plan)
+            return not plan.filter_stages.rejects(message) and not lemma_stage(message)
+
+        return check
+
+    def stage_peak(lemma_stage, text: str) -> int:
+        """Peak allocation of the lemma stage alone; lowercasing a long text has a peak of its own."""
+        message = filters._Message(text, window, plan)
+        if plan.filter_stages.rejects(message):
+            return 0
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        lemma_stage(message)
+        return tracemalloc.get_traced_memory()[1] - base
+
+    variants = (("lists", lists_stage, 0), ("stream", stream_stage, 0), ("capped", stream_stage, args.max_scan))
+    print(f"{args.messages} reposts of ~{len(texts[0]):,} chars, {sum(t.startswith(SELLER) for t in texts)} sellers")
+    print(f"{'':>8} {'msg/s':>10} {'lemmas/msg':>11} {'peak KiB/msg':>13} {'stage KiB/msg':>14} {'accepted':>9}")
+    verdicts = {}
+    baseline = None
+    for name, lemma_stage, max_scan in variants:
+        check = checker(lemma_stage)
+        filters.MAX_SCAN_CHARS = max_scan
+        calls = 0
+        start = time.perf_counter()
+        verdicts[name] = [check(text) for text in texts]
+        speed = len(texts) / (time.perf_counter() - start)
+        lemmas = calls / len(texts)
+        baseline = baseline or speed
+
+        peak = stage = 0
+        sample = texts[:200]
+        tracemalloc.start()
+        for text in sample:
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+            check(text)
+            peak += tracemalloc.get_traced_memory()[1] - base
+            stage += stage_peak(lemma_stage, text)
+        tracemalloc.stop()
+        print(
+            f"{name:>8} {speed:>10,.0f} {lemmas:>11,.1f} {peak / len(sample) / 1024:>13,.1f} "
+            f"{stage / len(sample) / 1024:>14,.1f} {sum(verdicts[name]):>9}  ({speed / baseline:.2f}x)"
+        )
+
+    mismatches = sum(a != b for a, b in zip(verdicts["lists"], verdicts["stream"]))
+    capped = sum(a != b for a, b in zip(verdicts["stream"], verdicts["capped"]))
+    print(f"verdict mismatches: {mismatches} (capped run differs on {capped})")
+    if mismatches:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
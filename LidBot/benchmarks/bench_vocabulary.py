@@ -0,0 +1,194 @@
+"""
+Classifying lemmas for the lemma checks: probing the car/intent/offer sets
+separately (the seller scan plus has_proximity), one vocabulary lookup per
+lemma kept as a list of (position, bits) tuples, and the ProximityEngine
+bytes state. Reports dict/set lookups per token, memory allocated per
+message at its peak, and the bytes and blocks a kept per-message state
+holds (tracemalloc), and fails if any verdict differs.
+
+    python benchmarks/bench_vocabulary.py --messages 20000 --words 40
+"""
+
+import random
+import sys
+import tracemalloc
+from typing import Callable, List, Tuple
+
+from _common import SAMPLE_MESSAGES, rate, bench_parser, use_bot
+
+
+class CountingSet(set):
+    lookups = 0
+
+    def __contains__(self, item) -> bool:
+        CountingSet.lookups += 1
+        return super().__contains__(item)
+
+
+class CountingDict(dict):
+    lookups = 0
+
+    def get(self, key, default=None):
+        CountingDict.lookups += 1
+        return super().get(key, default)
+
+
+def tuple_engine(engine_cls):
+    """The engine as it was before the bytes state: tag() keeps [(position, bits)] for tagged lemmas only."""
+
+    class TupleEngine(engine_cls):
+        def tag(self, lemmas):
+            tagged = [(index, bits) for index, bits in enumerate(map(self._tags.get, lemmas)) if bits]
+            present = 0
+            for _, bits in tagged:
+                present |= bits
+            return present, tagged
+
+        windowed = {}
+
+        def match(self, tagged, window, present=None):
+            rules = self.windowed.get(window)
+            if rules is None:
+                rules = self.windowed[window] = [
+                    (bit, left, right, window if own is None else own) for bit, left, right, own in self._rules
+                ]
+            all_rules = (1 << len(rules)) - 1
+            split = self._split
+            last = {}
+            matched = 0
+            for index, bits in tagged:
+                for bit, left, right, limit in rules:
+                    if bits & left:
+                        if bits & right or index - last.get(right, -(1 << 30)) <= limit:
+                            matched |= bit
+                    elif bits & right and index - last.get(left, -(1 << 30)) <= limit:
+                        matched |= bit
+                if matched == all_rules:
+                    break
+                for single in split[bits]:
+                    last[single] = index
+            return matched
+
+        def scan(self, lemmas, window):
+            present, tagged = self.tag(lemmas)
+            return present, self.match(tagged, window)
+
+    return TupleEngine
+
+
+def peak_bytes(check: Callable[[List[str]], object], messages: List[List[str]]) -> float:
+    tracemalloc.start()
+    total = 0
+    for lemmas in messages:
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        result = check(lemmas)
+        total += tracemalloc.get_traced_memory()[1] - base
+        del result
+    tracemalloc.stop()
+    return total / len(messages)
+
+
+def kept(state: Callable[[List[str]], object], messages: List[List[str]]) -> Tuple[float, float]:
+    """(bytes, blocks) still allocated per message while every message's state is kept."""
+    states = [None] * len(messages)
+    tracemalloc.start()
+    before_bytes, before_blocks = tracemalloc.get_traced_memory()[0], sys.getallocatedblocks()
+    for index, lemmas in enumerate(messages):
+        states[index] = state(lemmas)
+    kept_bytes, kept_blocks = tracemalloc.get_traced_memory()[0] - before_bytes, sys.getallocatedblocks() - before_blocks
+    tracemalloc.stop()
+    return kept_bytes / len(messages), kept_blocks / len(messages)
+
+
+def main() -> None:
+    parser = bench_parser(__doc__)
+    parser.add_argument("--messages", type=int, default=20000)
+    parser.add_argument("--words", type=int, default=40, help="lemmas per generated message")
+    parser.add_argument("--window", type=int, default=3)
+    parser.add_argument("--density", type=float, default=0.05, help="share of lemmas that are keywords")
+    args = parser.parse_args()
+    use_bot()
+
+    from bot.utils import filters
+    from bot.utils.proximity import ProximityEngine
+
+    plan = filters.current_rules()
+    engine = plan.proximity
+    car, intent, offer, rental = (plan.lemmas[name] for name in ("car", "intent", "offer", "rental"))
+    rng = random.Random(1)
+    filler = sorted(
+        {filters.safe_lemma(token) for text in SAMPLE_MESSAGES for token in filters.tokenize(text.lower())}
+        - (car | intent | offer | rental)
+    )
+    keywords = sorted(car | intent | rental)
+    messages = [
+        [rng.choice(keywords) if rng.random() < args.density else rng.choice(filler) for _ in range(args.words)]
+        for _ in range(args.messages)
+    ]
+    window = args.window
+    offer_bit = engine.bit("offer")
+    client = engine.rule_bit("client")
+
+    def sets_check(lemmas, car=car, intent=intent, offer=offer):
+        return (
+            any(lemma in offer for lemma in lemmas),
+            filters.has_proximity(lemmas, car, intent, window) or filters.has_proximity(lemmas, intent, car, window),
+        )
+
+    tuples = tuple_engine(ProximityEngine)(plan.lemmas, engine.rules)
+
+    def tuples_check(lemmas):
+        present, matched = tuples.scan(lemmas, window)
+        return bool(present & offer_bit), bool(matched & client)
+
+    def bytes_check(lemmas):
+        present, matched = engine.scan(lemmas, window)
+        return bool(present & offer_bit), bool(matched & client)
+
+    variants = {"sets": sets_check, "tuples": tuples_check, "bytes": bytes_check}
+    verdicts = {name: [check(lemmas) for lemmas in messages] for name, check in variants.items()}
+    mismatches = sum(len({verdicts[name][index] for name in variants}) > 1 for index in range(len(messages)))
+
+    # Lookup counts, in a separate pass over counting copies of the sets and vocabularies
+    tokens = len(messages) * args.words
+    lookups = {}
+    counting = [CountingSet(car), CountingSet(intent), CountingSet(offer)]
+    for lemmas in messages:
+        sets_check(lemmas, *counting)
+    lookups["sets"] = CountingSet.lookups / tokens
+    for name, engine_cls in (("tuples", tuple_engine(ProximityEngine)), ("bytes", ProximityEngine)):
+        counted = engine_cls(plan.lemmas, engine.rules)
+        counted._tags = CountingDict(counted._tags)
+        CountingDict.lookups = 0
+        for lemmas in messages:
+            counted.scan(lemmas, window)
+        lookups[name] = CountingDict.lookups / tokens
+    states = {
+        "sets": lambda lemmas: None,
+        "tuples": lambda lemmas: tuples.tag(lemmas)[1],
+        "bytes": lambda lemmas: engine.tag(lemmas)[1],
+    }
+
+    sample = messages[: min(len(messages), 2000)]
+    print(
+        f"{args.messages} messages of {args.words} lemmas, window {window}, density {args.density:.0%}, "
+        f"vocabulary {len(engine.vocabulary)} lemmas"
+    )
+    print(f"{'':>8} {'msg/s':>10} {'lookups/token':>14} {'peak B/msg':>11} {'state B/msg':>12} {'blocks/msg':>11}")
+    baseline = None
+    for name, check in variants.items():
+        speed = rate(lambda: [check(lemmas) for lemmas in messages], len(messages))
+        baseline = baseline or speed
+        state_bytes, state_blocks = kept(states[name], sample)
+        print(
+            f"{name:>8} {speed:>10,.0f} {lookups[name]:>14.2f} {peak_bytes(check, sample):>11,.0f} "
+            f"{state_bytes:>12,.0f} {state_blocks:>11.2f}  ({speed / baseline:.2f}x)"
+        )
+    print(f"verdict mismatches: {mismatches}")
+    if mismatches:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""
+Replay recorded messages through extract_text -> passes_filters ->
+build_notification without Telegram, and report throughput, per-message
+latency, memory and verdict changes against a baseline run.
+
+The corpus is JSONL (one object per line) or CSV with a header; the
+columns are `text`, and optionally `chat_id`, `id` and `date` (unix
+seconds or ISO 8601). Verdicts are matched to the baseline by `chat_id`
+and `id`, or by line number when a record has neither.
+
+    python benchmarks/replay.py corpus.jsonl --save-baseline base.json
+    python benchmarks/replay.py corpus.jsonl --baseline base.json --fail-on-diff
+    python benchmarks/replay.py corpus.csv --realtime --speedup 60
+
+Without a corpus the sample messages are replayed `--repeat` times.
+"""
+
+import csv
+import json
+import resource
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Dict, Iterator, List, Optional
+
+from _common import SAMPLE_MESSAGES, bench_parser, use_bot
+
+
+def load_corpus(path: Path) -> Iterator[Dict[str, str]]:
+    with open(path, encoding="utf-8", newline="") as fh:
+        if path.suffix.lower() == ".csv":
+            yield from csv.DictReader(fh)
+            return
+        for line in fh:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+
+def parse_date(value) -> Optional[float]:
+    if value in (None, ""):
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return datetime.fromisoformat(str(value).replace("Z", "+00:00")).timestamp()
+
+
+def record_key(record: Dict[str, str], index: int) -> str:
+    """`chat_id/id`, since message ids are only unique per chat; the line index when a record has neither."""
+    chat_id, message_id = record.get("chat_id"), record.get("id")
+    if chat_id in (None, "") and message_id in (None, ""):
+        return str(index)
+    return f"{'' if chat_id is None else chat_id}/{'' if message_id is None else message_id}"
+
+
+def percentile(ordered: List[float], fraction: float) -> float:
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] if ordered else 0.0
+
+
+def max_rss_mb() -> float:
+    # ru_maxrss is KB on Linux, bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def main() -> None:
+    parser = bench_parser(__doc__)
+    parser.add_argument("corpus", type=Path, nargs="?", help="JSONL or CSV file")
+    parser.add_argument("--repeat", type=int, default=1000, help="sample-message rounds when no corpus is given")
+    parser.add_argument("--window", type=int, default=3)
+    parser.add_argument("--realtime", action="store_true", help="keep the recorded gaps between messages")
+    parser.add_argument("--speedup", type=float, default=1.0, help="divide recorded gaps by this in --realtime")
+    parser.add_argument("--baseline", type=Path, help="verdicts from an earlier --save-baseline run")
+    parser.add_argument("--save-baseline", type=Path, help="write this run's verdicts here")
+    parser.add_argument("--fail-on-diff", action="store_true", help="exit 1 if any verdict differs from --baseline")
+    parser.add_argument("--show-diffs", type=int, default=10, help="print up to N changed messages")
+    parser.add_argument("--report", type=Path, help="also write the measurements as JSON")
+    args = parser.parse_args()
+    use_bot()
+
+    from bot.utils import filters
+    from bot.utils.parser import build_notification, extract_text
+
+    if args.corpus is not None:
+        records = list(load_corpus(args.corpus))
+    else:
+        records = [
+            {"id": str(i), "chat_id": "0", "text": SAMPLE_MESSAGES[i % len(SAMPLE_MESSAGES)]}
+            for i in range(args.repeat * len(SAMPLE_MESSAGES))
+        ]
+    filters.get_morph()
+    rss_before = max_rss_mb()
+
+    verdicts: Dict[str, bool] = {}
+    texts: Dict[str, str] = {}
+    latencies: List[float] = []
+    first_date: Optional[float] = None
+    started = time.perf_counter()
+    for index, record in enumerate(records):
+        key = record_key(record, index)
+        if args.realtime:
+            date = parse_date(record.get("date"))
+            if date is not None:
+                first_date = date if first_date is None else first_date
+                delay = (date - first_date) / args.speedup - (time.perf_counter() - started)
+                if delay > 0:
+                    time.sleep(delay)
+
+        event = SimpleNamespace(
+            raw_text=record.get("text") or "", message=None, id=record.get("id"), chat_id=record.get("chat_id")
+        )
+        t0 = time.perf_counter()
+        text = extract_text(event)
+        accepted = bool(text) and filters.passes_filters(text, args.window)
+        if accepted:
+            build_notification(f"chat {record.get('chat_id', '')}", text, None)
+        latencies.append(time.perf_counter() - t0)
+        verdicts[key] = accepted
+        texts[key] = text
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    busy = sum(latencies)
+    report = {
+        "rules": str(filters.RULES_FILE),
+        "messages": len(records),
+        "accepted": sum(verdicts.values()),
+        "wall_msgs_per_sec": len(records) / elapsed if elapsed else 0.0,
+        "busy_msgs_per_sec": len(records) / busy if busy else 0.0,
+        "p50_us": percentile(latencies, 0.50) * 1e6,
+        "p95_us": percentile(latencies, 0.95) * 1e6,
+        "p99_us": percentile(latencies, 0.99) * 1e6,
+        "max_rss_mb": max_rss_mb(),
+    }
+    print(f"rules {filters.RULES_FILE}, {len(records)} messages, {sum(verdicts.values())} accepted")
+    print(f"wall   {elapsed:.2f} s, {report['wall_msgs_per_sec']:,.0f} msg/s")
+    print(f"filter {report['busy_msgs_per_sec']:,.0f} msg/s of processing time")
+    print(
+        f"latency p50 {report['p50_us']:.0f} us, p95 {report['p95_us']:.0f} us, "
+        f"p99 {report['p99_us']:.0f} us, max {latencies[-1] * 1e6 if latencies else 0:.0f} us"
+    )
+    print(f"memory max RSS {report['max_rss_mb']:.1f} MB (+{report['max_rss_mb'] - rss_before:.1f} MB during replay)")
+
+    if args.save_baseline is not None:
+        args.save_baseline.write_text(
+            json.dumps(
+                {"rules": str(filters.RULES_FILE), "window": args.window, "verdicts": verdicts}, ensure_ascii=False
+            ),
+            encoding="utf-8",
+        )
+        print(f"saved {len(verdicts)} verdicts to {args.save_baseline}")
+
+    if args.baseline is not None:
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8"))["verdicts"]
+        changed = [key for key, verdict in verdicts.items() if key in baseline and baseline[key] != verdict]
+        missing = len(set(baseline) ^ set(verdicts))
+        gained = sum(1 for key in changed if verdicts[key])
+        print(
+            f"vs {args.baseline}: {len(changed)} changed ({gained} newly accepted, "
+            f"{len(changed) - gained} newly rejected), {missing} unmatched ids"
+        )
+        for key in changed[: args.show_diffs]:
+            print(f"  {'+' if verdicts[key] else '-'} [{key}] {texts[key][:100]!r}")
+        report["changed"] = len(changed)
+
+    if args.report is not None:
+        args.report.write_text(json.dumps(report, indent=1), encoding="utf-8")
+    if args.baseline is not None and report["changed"] and args.fail_on_diff:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
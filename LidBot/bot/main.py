@@ -0,0 +1,889 @@
+# -*- coding: utf-8 -*-
+"""
+Minimalistic userbot: forwards ONLY inbound car rental requests from clients.
+
+This version follows a portfolio-friendly structure with dedicated utils modules.
+The runtime is shared by the language folders (english/lidbot, russian/lidbot):
+each one holds its chat lists and state and starts it through its run.py.
+"""
+
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from telethon import TelegramClient, events
+from telethon.utils import get_peer_id
+
+if __name__ == "__main__" and __package__ is None:  # pragma: no cover
+    CURRENT_DIR = Path(__file__).resolve().parent
+    sys.path.append(str(CURRENT_DIR.parent))
+    __package__ = "bot"
+
+from .utils.catchup import LastSeenStore, catch_up  # type: ignore[import]
+from .utils.chat_stats import STATES, ChatPolicy, ChatStats, write_report  # type: ignore[import]
+from .utils.channels_loader import load_target_chats  # type: ignore[import]
+from .utils.chat_watcher import FileWatcher  # type: ignore[import]
+from .utils.dedup import NearDuplicateIndex  # type: ignore[import]
+from .utils.delivery import DeliveryQueue  # type: ignore[import]
+from .utils.filter_pool import FilterPool  # type: ignore[import]
+from .utils.filters import (  # type: ignore[import]
+    RULES_FILE,
+    configure_filter_stages,
+    configure_lemma_cache,
+    current_rules,
+    filter_stats,
+    load_rules,
+    passes_filters_batch,
+)
+from .utils.i18n import set_messages, tr  # type: ignore[import]
+from .utils.lemma_cache import LemmaCache  # type: ignore[import]
+from .utils.metrics import (  # type: ignore[import]
+    REGISTRY,
+    Counter,
+    Histogram,
+    enable as enable_metrics,
+    start_metrics_server,
+)
+from .utils.notifier import close_notifier, notify  # type: ignore[import]
+from .utils.outbox import Outbox  # type: ignore[import]
+from .utils.parser import (  # type: ignore[import]
+    ChatMetaCache,
+    Lead,
+    extract_text,
+    refresh_chat_meta,
+    resolve_chat_meta,
+)
+from .utils.pipeline import Pipeline, Stage  # type: ignore[import]
+from .utils.profiles import PROFILES_DIR, Profile  # type: ignore[import]
+from .utils.rules import RulePlan  # type: ignore[import]
+from .utils.sharding import SeenSet, ShardedChats, dialog_ids  # type: ignore[import]
+
+# ---------------- CONFIG ----------------
+# Chat lists and state live in the language folder (LIDBOT_HOME); profiles and rules in this package
+HOME_DIR = Path(os.getenv("LIDBOT_HOME", ".")).expanduser().resolve()
+DATA_DIR = HOME_DIR / "data"
+SHARED_DATA_DIR = Path(__file__).resolve().parent / "data"
+
+
+def env_path(name: str, default: Path) -> Path:
+    # Relative paths are taken from the language folder
+    return (HOME_DIR / Path(os.getenv(name, str(default))).expanduser()).resolve()
+
+
+def env_optional_path(name: str, default: Path) -> Optional[Path]:
+    raw = os.getenv(name)
+    if raw is not None and not raw.strip():
+        return None
+    return env_path(name, default)
+
+
+def env_int(name: str, default: Optional[int] = None) -> Optional[int]:
+    raw = os.getenv(name)
+    if raw is None:
+        return default
+    try:
+        return int(raw)
+    except ValueError as exc:
+        raise RuntimeError(tr("Environment variable {name} must be an integer", name=name)) from exc
+
+
+def env_bool(name: str, default: bool) -> bool:
+    raw = os.getenv(name)
+    if raw is None:
+        return default
+    return raw.strip().lower() in TRUE_WORDS
+
+
+def load_profile(name: str, primary: bool) -> Profile:
+    """Texts from the profile's data file; destination and chat list from env, <NAME>_-prefixed unless primary."""
+    path = PROFILES_DIR / f"{name}.json"
+    if not path.exists():
+        raise RuntimeError(tr("Unknown profile {name}: {path} not found", name=name, path=path))
+    profile = Profile.load(name)
+    if primary:
+        # Log lines, config errors and env flags follow the first profile's language
+        set_messages(profile.messages)
+    prefix, suffix = ("", "") if primary else (f"{name.upper()}_", f".{name}")
+    profile.bot_token = os.getenv(prefix + "BOT_TOKEN", os.getenv("BOT_TOKEN", ""))
+    profile.dest_chat_id = env_int(prefix + "DEST_CHAT_ID") or 0
+    profile.groups_file = env_path(prefix + "GROUPS_FILE", DATA_DIR / f"all_channels{suffix}.txt")
+    profile.groups_ids_file = env_path(prefix + "GROUPS_IDS_FILE", DATA_DIR / f"channel_ids_cache{suffix}.txt")
+    profile.cleaned_usernames_file = env_path(
+        prefix + "CLEANED_USERNAMES_FILE", DATA_DIR / f"active_channels_usernames{suffix}.txt"
+    )
+    return profile
+
+
+# Language profiles (bot/data/profiles/<name>.json); all but the first read RU_DEST_CHAT_ID-style variables
+PROFILE_NAMES = [name.strip() for name in os.getenv("PROFILES", "en").split(",") if name.strip()]
+PROFILES = [load_profile(name, index == 0) for index, name in enumerate(PROFILE_NAMES)]
+# Env flag words come from the first profile only: "да" is true in the Russian folder, not the English one
+TRUE_WORDS = PROFILES[0].true_words or {"1", "true", "yes", "on"}
+
+API_ID = env_int("API_ID")
+API_HASH = os.getenv("API_HASH")
+SESSION_NAME = os.getenv("SESSION_NAME", "userbot_session")
+# Several comma-separated sessions split the monitored chats between accounts (the first one resolves and sends)
+SESSION_NAMES = [name.strip() for name in os.getenv("SESSION_NAMES", SESSION_NAME).split(",") if name.strip()]
+# With several sessions each chat goes to an account that is in it; SHARDS_FILE lists which one (empty: not saved)
+SHARDS_FILE = env_optional_path("SHARDS_FILE", DATA_DIR / "shards.tsv")
+
+BOT_API_URL = os.getenv("BOT_API_URL", "https://api.telegram.org").rstrip("/")
+# Above NOTIFY_RATE messages/minute leads are merged into digests, sent every NOTIFY_FLUSH_INTERVAL seconds
+NOTIFY_RATE = int(os.getenv("NOTIFY_RATE", 20))
+NOTIFY_FLUSH_INTERVAL = float(os.getenv("NOTIFY_FLUSH_INTERVAL", 3))
+# Leads are kept in OUTBOX_FILE until sent, retried with backoff; OUTBOX_FILE= disables it
+OUTBOX_FILE = env_optional_path("OUTBOX_FILE", DATA_DIR / "outbox.sqlite3")
+OUTBOX_RETRY = float(os.getenv("OUTBOX_RETRY", 5))
+OUTBOX_MAX_RETRY = float(os.getenv("OUTBOX_MAX_RETRY", 600))
+
+PROXIMITY_WINDOW = int(os.getenv("PROXIMITY_WINDOW", 3))
+# How often (seconds) RULES_FILE is checked for edits; 0 disables hot reload
+RULES_RELOAD_INTERVAL = float(os.getenv("RULES_RELOAD_INTERVAL", 30))
+
+# Auto-saving the filtered set of valid usernames
+AUTO_WRITE_CLEANED = env_bool("AUTO_WRITE_CLEANED", True)
+MAX_SKIP_LOG = int(os.getenv("MAX_SKIP_LOG", 50))
+# Username resolution: parallel requests, requests/sec and the longest FloodWait worth sleeping through
+RESOLVE_CONCURRENCY = int(os.getenv("RESOLVE_CONCURRENCY", 8))
+RESOLVE_RATE = float(os.getenv("RESOLVE_RATE", 2))
+MAX_FLOOD_WAIT = int(os.getenv("MAX_FLOOD_WAIT", 900))
+# Cached channel IDs older than this (seconds) are resolved again
+CHANNEL_CACHE_TTL = int(os.getenv("CHANNEL_CACHE_TTL", 7 * 24 * 3600))
+# How often (seconds) GROUPS_FILE/GROUPS_IDS_FILE are checked for edits; 0 disables hot reload
+CHATS_RELOAD_INTERVAL = float(os.getenv("CHATS_RELOAD_INTERVAL", 30))
+# Chat titles/usernames for notifications are cached this long (seconds) and refreshed in the background
+CHAT_META_TTL = int(os.getenv("CHAT_META_TTL", 3600))
+CHAT_META_SIZE = int(os.getenv("CHAT_META_SIZE", 10000))
+# Last message id per chat, to catch up after a restart; LAST_SEEN_FILE= disables it
+LAST_SEEN_FILE = env_optional_path("LAST_SEEN_FILE", DATA_DIR / "last_seen.json")
+LAST_SEEN_SAVE_INTERVAL = float(os.getenv("LAST_SEEN_SAVE_INTERVAL", 10))
+# Catch-up: parallel chats, history requests/sec, messages per chat and their maximum age (seconds)
+CATCHUP_CONCURRENCY = int(os.getenv("CATCHUP_CONCURRENCY", 8))
+CATCHUP_RATE = float(os.getenv("CATCHUP_RATE", 3))
+CATCHUP_LIMIT = int(os.getenv("CATCHUP_LIMIT", 500))
+CATCHUP_MAX_AGE = int(os.getenv("CATCHUP_MAX_AGE", 24 * 3600))
+# Per-chat stats and the chat report, saved every CHAT_REPORT_INTERVAL seconds; empty paths disable them
+CHAT_STATS_FILE = env_optional_path("CHAT_STATS_FILE", DATA_DIR / "chat_stats.json")
+CHAT_REPORT_FILE = env_optional_path("CHAT_REPORT_FILE", DATA_DIR / "chat_report.tsv")
+CHAT_REPORT_INTERVAL = float(os.getenv("CHAT_REPORT_INTERVAL", 600))
+# Check only some messages of chats that have not passed the filters for a while (see ChatPolicy)
+CHAT_POLICY = env_bool("CHAT_POLICY", False)
+CHAT_QUIET_AFTER = int(os.getenv("CHAT_QUIET_AFTER", 500))
+CHAT_SAMPLE_EVERY = int(os.getenv("CHAT_SAMPLE_EVERY", 10))
+CHAT_PROBE_EVERY = int(os.getenv("CHAT_PROBE_EVERY", 100))
+
+# Lead pipeline: ingest -> filter -> enrich -> deliver, bounded queues per stage
+PIPELINE_QUEUE_SIZE = int(os.getenv("PIPELINE_QUEUE_SIZE", 1000))
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", 1))
+FILTER_WORKERS = int(os.getenv("FILTER_WORKERS", 1))
+ENRICH_WORKERS = int(os.getenv("ENRICH_WORKERS", 4))
+DELIVER_WORKERS = int(os.getenv("DELIVER_WORKERS", 2))
+STATS_INTERVAL = int(os.getenv("STATS_INTERVAL", 300))
+# Drop leads within DEDUP_DISTANCE SimHash bits of one seen in the last DEDUP_TTL seconds; 0 disables
+DEDUP_TTL = int(os.getenv("DEDUP_TTL", 3600))
+DEDUP_SIZE = int(os.getenv("DEDUP_SIZE", 10000))
+DEDUP_DISTANCE = int(os.getenv("DEDUP_DISTANCE", 3))
+# Filtering takes up to FILTER_BATCH_SIZE queued messages at once; FILTER_PROCESSES > 0 moves it into a process pool
+FILTER_PROCESSES = int(os.getenv("FILTER_PROCESSES", 0))
+FILTER_BATCH_SIZE = int(os.getenv("FILTER_BATCH_SIZE", 32))
+# Reorder the lemma-free filter checks by measured rejections per unit of CPU (verdicts stay the same)
+FILTER_ADAPTIVE = env_bool("FILTER_ADAPTIVE", False)
+# Lemma cache shared by both language folders; LEMMA_CACHE_FILE= keeps it in memory only
+LEMMA_CACHE_SIZE = int(os.getenv("LEMMA_CACHE_SIZE", 20000))
+LEMMA_CACHE_FILE = env_optional_path("LEMMA_CACHE_FILE", SHARED_DATA_DIR / "lemma_cache.sqlite3")
+# Prometheus text metrics on http://METRICS_HOST:METRICS_PORT/metrics; 0 turns recording off entirely
+METRICS_PORT = int(os.getenv("METRICS_PORT", 0))
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+# ----------------------------------------
+
+if API_ID is None or not API_HASH:
+    raise RuntimeError(tr("API_ID and API_HASH must be provided via environment variables."))
+
+MESSAGES_RECEIVED = Counter("lidbot_messages_received_total", "Messages received")
+CHAT_META_SECONDS = Histogram("lidbot_chat_meta_seconds", "Time spent in resolve_chat_meta")
+STAGE_ERRORS = Counter("lidbot_errors_total", "Exceptions raised by pipeline stages", ["stage"])
+
+
+async def main():
+    clients = {name: TelegramClient(name, API_ID, API_HASH) for name in SESSION_NAMES}
+    for shard_client in clients.values():
+        await shard_client.start()
+    client = clients[SESSION_NAMES[0]]
+
+    print("=" * 70)
+    print(tr("🤖 LidBot: forwarding only client car-rental requests"))
+    print("=" * 70)
+
+    # With FILTER_PROCESSES only the workers lemmatize, and each opens the file itself: the parent keeps
+    # no SQLite connection that fork() would copy into them
+    lemma_cache_file = LEMMA_CACHE_FILE if FILTER_PROCESSES <= 0 else None
+    lemma_cache = configure_lemma_cache(LEMMA_CACHE_SIZE, lemma_cache_file)
+    if lemma_cache_file is not None:
+        print(
+            tr(
+                "🧠 Lemma cache: {count} entries from {path} in {ms:.1f} ms",
+                count=lemma_cache.warm_entries,
+                path=lemma_cache_file,
+                ms=lemma_cache.warm_seconds * 1000,
+            )
+        )
+    configure_filter_stages(FILTER_ADAPTIVE)
+    print_rules_report(current_rules())
+    if len(PROFILES) > 1:
+        print(tr("🌐 Profiles: {names}", names=", ".join(PROFILE_NAMES)))
+
+    chats, routes = await load_chats(client)
+    if not chats:
+        lemma_cache.close()
+        await disconnect_all(clients)
+        return
+    monitored = ShardedChats(SESSION_NAMES)
+    if len(clients) > 1:
+        await find_visible_chats(clients, monitored)
+    monitored.replace(chats)
+    chat_list = list(chats)
+    chat_meta = ChatMetaCache(CHAT_META_TTL, CHAT_META_SIZE)
+    if len(clients) > 1:
+        print_shards(monitored)
+    seen = SeenSet()
+
+    chat_stats = ChatStats()
+    if CHAT_STATS_FILE is not None:
+        try:
+            chat_stats.load(CHAT_STATS_FILE)
+        except Exception as exc:
+            print(tr("⚠️ Failed to read {path}, starting chat stats afresh:", path=CHAT_STATS_FILE), exc)
+            chat_stats = ChatStats()
+    chat_stats.retain(routes)
+    chat_policy = ChatPolicy(chat_stats, CHAT_POLICY, CHAT_QUIET_AFTER, CHAT_SAMPLE_EVERY, CHAT_PROBE_EVERY)
+    if CHAT_POLICY:
+        states = chat_policy.summary()
+        print(
+            tr(
+                "🔇 Chat policy: {sampled} chats sampled, {muted} muted; after {quiet} checked messages "
+                "without a lead 1 in {sample} is checked, then 1 in {probe}",
+                sampled=states["sampled"],
+                muted=states["muted"],
+                quiet=CHAT_QUIET_AFTER,
+                sample=CHAT_SAMPLE_EVERY,
+                probe=CHAT_PROBE_EVERY,
+            )
+        )
+    else:
+        chat_policy.reset()
+
+    last_seen = LastSeenStore(LAST_SEEN_FILE) if LAST_SEEN_FILE is not None else None
+    if last_seen is not None:
+        try:
+            last_seen.load()
+        except Exception as exc:
+            print(tr("⚠️ Failed to read {path}, skipping catch-up:", path=LAST_SEEN_FILE), exc)
+    # Taken before live updates start moving the ids forward
+    last_ids = last_seen.snapshot() if last_seen is not None else {}
+
+    def settle(message) -> None:
+        # A message's id is stored once it has been dealt with, so a restart fetches whatever was still queued
+        if last_seen is not None:
+            last_seen.update(message.chat_id, message.id)
+
+    def ingest(event) -> Optional[Lead]:
+        started = time.perf_counter()
+        text = extract_text(event)
+        chat_stats.spent(event.chat_id, time.perf_counter() - started)
+        if not text:
+            settle(event)
+            return None
+        return Lead(event=event, text=text, profiles=routes.get(event.chat_id, PROFILES[:1]))
+
+    def screen(leads: List[Lead], verdicts: List[bool], seconds: float) -> List[Optional[Lead]]:
+        # The batch's time is split by text length, which is what filtering cost grows with
+        total = sum(len(lead.text) for lead in leads) or 1
+        for lead, ok in zip(leads, verdicts):
+            chat_stats.spent(lead.event.chat_id, seconds * len(lead.text) / total)
+            if ok:
+                chat_policy.passed(lead.event.chat_id)
+            else:
+                settle(lead.event)
+        return [lead if ok else None for lead, ok in zip(leads, verdicts)]
+
+    def filter_leads(leads: List[Lead]) -> List[Optional[Lead]]:
+        started = time.perf_counter()
+        verdicts = passes_filters_batch([lead.text for lead in leads], PROXIMITY_WINDOW)
+        return screen(leads, verdicts, time.perf_counter() - started)
+
+    async def filter_leads_pooled(leads: List[Lead]) -> List[Optional[Lead]]:
+        verdicts, seconds = await filter_pool.passes_filters_timed([lead.text for lead in leads], PROXIMITY_WINDOW)
+        return screen(leads, verdicts, seconds)
+
+    filter_pool = (
+        FilterPool(FILTER_PROCESSES, LEMMA_CACHE_SIZE, LEMMA_CACHE_FILE, FILTER_ADAPTIVE)
+        if FILTER_PROCESSES > 0
+        else None
+    )
+    if filter_pool is not None:
+        filter_stage = Stage(
+            "filter",
+            filter_leads_pooled,
+            max(FILTER_WORKERS, FILTER_PROCESSES),
+            PIPELINE_QUEUE_SIZE,
+            batch_size=FILTER_BATCH_SIZE,
+        )
+    else:
+        filter_stage = Stage("filter", filter_leads, FILTER_WORKERS, PIPELINE_QUEUE_SIZE, batch_size=FILTER_BATCH_SIZE)
+
+    dedup = NearDuplicateIndex(DEDUP_TTL, DEDUP_SIZE, DEDUP_DISTANCE) if DEDUP_TTL > 0 else None
+
+    def drop_duplicate(lead: Lead) -> Optional[Lead]:
+        # Per destination: a text already sent to one profile's chat still goes to another's
+        lead.profiles = [profile for profile in lead.profiles if dedup.check(lead.text, profile.name)]
+        if lead.profiles:
+            return lead
+        settle(lead.event)
+        return None
+
+    async def enrich(lead: Lead) -> Lead:
+        with CHAT_META_SECONDS.time():
+            lead.title, lead.link = await resolve_chat_meta(lead.event, chat_meta)
+        lead.notifications = {
+            profile.name: profile.notification(lead.title, lead.text, lead.link) for profile in lead.profiles
+        }
+        return lead
+
+    outbox = Outbox(OUTBOX_FILE, OUTBOX_RETRY, OUTBOX_MAX_RETRY) if OUTBOX_FILE is not None else None
+    # One sender per profile: each destination has its own rate limit and digests
+    deliveries = {
+        profile.name: DeliveryQueue(
+            lambda text, profile=profile: notify(client, text, profile.bot_token, profile.dest_chat_id, BOT_API_URL),
+            NOTIFY_RATE,
+            NOTIFY_FLUSH_INTERVAL,
+            digest_header=profile.digest_header,
+            on_sent=outbox.mark_delivered if outbox is not None else None,
+            on_failed=outbox.mark_failed if outbox is not None else None,
+        )
+        for profile in PROFILES
+    }
+
+    async def deliver(leads: List[Lead]) -> List[None]:
+        # Everything queued here goes to disk before it is sent, one transaction per profile
+        for profile in PROFILES:
+            batch = [lead for lead in leads if profile.name in lead.notifications]
+            if not batch:
+                continue
+            texts = [lead.notifications[profile.name] for lead in batch]
+            keys: List[Optional[int]] = [None] * len(batch)
+            if outbox is not None:
+                try:
+                    keys = await outbox.add(texts, profile.name)
+                except Exception as exc:
+                    print(tr("⚠️ Outbox write failed, sending without it:"), exc)
+            for lead, text, key in zip(batch, texts, keys):
+                deliveries[profile.name].put(text, key)
+                print(profile.forwarded_log.format(title=lead.title))
+        for lead in leads:
+            chat_stats.lead(lead.event.chat_id)
+            settle(lead.event)
+        return [None] * len(leads)
+
+    def redeliver(text: str, key: int, channel: str) -> None:
+        # Rows saved before profiles existed, or for a profile no longer served, go to the first one
+        deliveries.get(channel, deliveries[PROFILES[0].name]).put(text, key)
+
+    stages = [Stage("ingest", ingest, INGEST_WORKERS, PIPELINE_QUEUE_SIZE), filter_stage]
+    if dedup is not None:
+        stages.append(Stage("dedup", drop_duplicate, 1, PIPELINE_QUEUE_SIZE))
+    stages.append(Stage("enrich", enrich, ENRICH_WORKERS, PIPELINE_QUEUE_SIZE))
+    stages.append(Stage("deliver", deliver, DELIVER_WORKERS, PIPELINE_QUEUE_SIZE, batch_size=PIPELINE_QUEUE_SIZE))
+
+    def on_error(stage: str, exc: Exception) -> None:
+        STAGE_ERRORS.inc(stage)
+        print(tr("Handler error ({stage}):", stage=stage), exc)
+
+    pipeline = Pipeline(stages, on_error=on_error)
+    if outbox is not None:
+        waiting = await outbox.open()
+        print(tr("📮 Outbox {path}: {count} undelivered leads from earlier runs", path=OUTBOX_FILE, count=waiting))
+    pipeline.start()
+    for delivery in deliveries.values():
+        delivery.start()
+    outbox_sender = asyncio.create_task(outbox.run(redeliver)) if outbox is not None else None
+
+    async def accept(message) -> None:
+        # The same message can arrive through more than one account, or both live and from catch-up
+        if seen.add((message.chat_id, message.id)):
+            # Chats the policy has turned down are only counted for most of their messages
+            if chat_policy.admit(message.chat_id):
+                await pipeline.submit(message)
+            else:
+                settle(message)
+
+    # First live id per chat while catch-up runs: each chat's catch-up stops short of it
+    live_ids: Optional[Dict[int, int]] = {} if last_seen is not None else None
+
+    async def message_handler(event):
+        MESSAGES_RECEIVED.inc()
+        if live_ids is not None:
+            live_ids.setdefault(event.chat_id, event.id)
+        await accept(event)
+
+    async def run_catch_up() -> None:
+        nonlocal live_ids
+        started = time.perf_counter()
+        shards = monitored.partition(chat_list)
+        total = len(chat_list)
+        done = 0
+
+        def progress(_shard_done: int, _shard_total: int) -> None:
+            nonlocal done
+            done += 1
+            if done == total or done % 100 == 0:
+                print(tr("⏪ Catch-up: {done}/{total} chats", done=done, total=total))
+
+        results = await asyncio.gather(
+            *(
+                catch_up(
+                    clients[name],
+                    shard_chats,
+                    last_ids,
+                    accept,
+                    last_seen.update,
+                    concurrency=CATCHUP_CONCURRENCY,
+                    rate=CATCHUP_RATE,
+                    limit=CATCHUP_LIMIT,
+                    max_age=CATCHUP_MAX_AGE,
+                    max_flood_wait=MAX_FLOOD_WAIT,
+                    progress=progress,
+                    live_ids=live_ids,
+                    # Only the first session resolved the chats
+                    own_peers=name != SESSION_NAMES[0],
+                )
+                for name, shard_chats in shards.items()
+                if shard_chats
+            )
+        )
+        live_ids = None
+        print(
+            tr(
+                "⏪ Catch-up done in {seconds:.1f} s: {messages} missed messages, {new_chats} new chats, "
+                "{failed} failed",
+                seconds=time.perf_counter() - started,
+                messages=sum(r["messages"] for r in results),
+                new_chats=sum(r["new_chats"] for r in results),
+                failed=sum(r["failed"] for r in results),
+            )
+        )
+
+    async def save_last_seen() -> None:
+        while True:
+            await asyncio.sleep(LAST_SEEN_SAVE_INTERVAL)
+            try:
+                last_seen.save()
+            except OSError as exc:
+                print(tr("⚠️ Failed to write {path}:", path=LAST_SEEN_FILE), exc)
+
+    async def reload_chats() -> None:
+        try:
+            chats, new_routes = await load_chats(client)
+        except Exception as exc:
+            print(tr("⚠️ Failed to reload the chat list:"), exc)
+            return
+        if not chats:
+            print(tr("⚠️ Reloaded chat list is empty, still monitoring {count} chats", count=len(monitored)))
+            return
+        if len(clients) > 1:
+            await find_visible_chats(clients, monitored)
+        added, removed = monitored.replace(chats)
+        chat_list[:] = chats
+        routes.clear()
+        routes.update(new_routes)
+        chat_stats.retain(routes)
+        print(
+            tr(
+                "🔁 Chat list reloaded: +{added} / -{removed}, monitoring {count} chats",
+                added=len(added),
+                removed=len(removed),
+                count=len(monitored),
+            )
+        )
+        if len(clients) > 1:
+            print_shards(monitored)
+            save_shards()
+
+    async def reload_rules() -> None:
+        try:
+            plan = load_rules()
+        except Exception as exc:
+            print(tr("⚠️ Failed to compile the rules, keeping the previous ones:"), exc)
+            return
+        if filter_pool is not None:
+            filter_pool.reload_rules()
+        print(tr("🔁 Rules reloaded"))
+        print_rules_report(plan)
+
+    def chat_name(chat_id: int) -> str:
+        meta = chat_meta.peek(chat_id)
+        if meta is None:
+            return ""
+        return f"@{meta.username}" if meta.username else meta.title
+
+    def save_shards() -> None:
+        if len(clients) < 2 or SHARDS_FILE is None:
+            return
+        try:
+            monitored.write_assignment(SHARDS_FILE, chat_name)
+        except OSError as exc:
+            print(tr("⚠️ Failed to write {path}:", path=SHARDS_FILE), exc)
+
+    def save_chat_stats() -> None:
+        try:
+            if CHAT_STATS_FILE is not None:
+                chat_stats.save(CHAT_STATS_FILE)
+            if CHAT_REPORT_FILE is not None:
+                write_report(CHAT_REPORT_FILE, chat_stats, chat_name)
+        except OSError as exc:
+            print(tr("⚠️ Failed to write the chat stats:"), exc)
+
+    async def report_chats() -> None:
+        while True:
+            await asyncio.sleep(CHAT_REPORT_INTERVAL)
+            save_chat_stats()
+
+    async def chat_renamed(event):
+        chat_meta.invalidate(event.chat_id)
+
+    async def keep_chat_meta_fresh() -> None:
+        while True:
+            started = time.perf_counter()
+            cached = await refresh_chat_meta(client, list(chat_list), chat_meta)
+            seconds = time.perf_counter() - started
+            print(tr("🏷️ Cached metadata for {count} chats in {seconds:.1f} s", count=cached, seconds=seconds))
+            # Rewritten with the chat names now known
+            save_shards()
+            await asyncio.sleep(max(60, CHAT_META_TTL / 2))
+
+    for name, shard_client in clients.items():
+        shard_client.add_event_handler(message_handler, events.NewMessage(func=monitored.accepts(name)))
+        shard_client.add_event_handler(chat_renamed, events.ChatAction(func=lambda event: event.new_title is not None))
+    save_shards()
+    print(tr("👂 Userbot is running..."))
+    # Live handlers are already registered, so nothing posted during catch-up is missed
+    catcher = asyncio.create_task(run_catch_up()) if last_seen is not None else None
+    last_seen_saver = asyncio.create_task(save_last_seen()) if last_seen is not None else None
+    reporter = (
+        asyncio.create_task(
+            report_stats(pipeline, lemma_cache, dedup, filter_pool is None, chat_meta, deliveries, outbox, chat_policy)
+        )
+        if STATS_INTERVAL > 0
+        else None
+    )
+    metrics_server = None
+    if METRICS_PORT > 0:
+        enable_metrics()
+        REGISTRY.add_collector(runtime_metrics(pipeline, lemma_cache, dedup, filter_pool is None, chat_policy))
+        metrics_server = await start_metrics_server(METRICS_HOST, METRICS_PORT)
+        print(tr("📊 Metrics on http://{host}:{port}/metrics", host=METRICS_HOST, port=METRICS_PORT))
+    meta_refresher = asyncio.create_task(keep_chat_meta_fresh())
+    chat_files = [path for profile in PROFILES for path in (profile.groups_file, profile.groups_ids_file)]
+    watcher = (
+        asyncio.create_task(FileWatcher(chat_files, reload_chats, CHATS_RELOAD_INTERVAL).run())
+        if CHATS_RELOAD_INTERVAL > 0
+        else None
+    )
+    rules_watcher = (
+        asyncio.create_task(FileWatcher([RULES_FILE], reload_rules, RULES_RELOAD_INTERVAL).run())
+        if RULES_RELOAD_INTERVAL > 0
+        else None
+    )
+    chat_reporter = asyncio.create_task(report_chats()) if CHAT_REPORT_INTERVAL > 0 else None
+    try:
+        # Stop as soon as any account disconnects: its share of chats would go unmonitored otherwise
+        runners = [asyncio.ensure_future(shard_client.run_until_disconnected()) for shard_client in clients.values()]
+        await asyncio.wait(runners, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for task in (
+            reporter, watcher, rules_watcher, chat_reporter, meta_refresher, outbox_sender, catcher, last_seen_saver
+        ):
+            if task is not None:
+                task.cancel()
+        if metrics_server is not None:
+            metrics_server.close()
+        # Let the queued messages run through, so that their ids can be stored as done
+        try:
+            await asyncio.wait_for(pipeline.join(), 10.0)
+        except asyncio.TimeoutError:
+            pass
+        await pipeline.stop()
+        save_chat_stats()
+        if last_seen is not None:
+            try:
+                last_seen.save()
+            except OSError as exc:
+                print(tr("⚠️ Failed to write {path}:", path=LAST_SEEN_FILE), exc)
+        for delivery in deliveries.values():
+            await delivery.close()
+        if outbox is not None:
+            await outbox.close()
+        if filter_pool is not None:
+            filter_pool.shutdown()
+        await close_notifier()
+        lemma_cache.close()
+        await disconnect_all(clients)
+
+
+async def disconnect_all(clients: Dict[str, TelegramClient]) -> None:
+    for shard_client in clients.values():
+        if shard_client.is_connected():
+            await shard_client.disconnect()
+
+
+async def find_visible_chats(clients: Dict[str, TelegramClient], monitored: ShardedChats) -> None:
+    """Tell `monitored` which chats each account is in; a session whose dialogs cannot be listed keeps the last list."""
+    for name, shard_client in clients.items():
+        try:
+            monitored.set_visible(name, await dialog_ids(shard_client))
+        except Exception as exc:
+            print(tr("⚠️ Failed to list the chats of session {name}:", name=name), exc)
+
+
+def print_shards(monitored: ShardedChats) -> None:
+    for name, chat_set in monitored.sets.items():
+        print(tr("🧩 Shard {name}: {count} chats", name=name, count=len(chat_set)))
+    if monitored.unreachable:
+        print(
+            tr(
+                "⚠️ {count} chats are not joined by any session, no live updates will come from them",
+                count=len(monitored.unreachable),
+            )
+        )
+
+
+async def load_chats(client) -> Tuple[List, Dict[int, List[Profile]]]:
+    """Every profile's chats, merged; returns (chats, chat id -> the profiles it belongs to)."""
+    chats: List = []
+    routes: Dict[int, List[Profile]] = {}
+    for profile in PROFILES:
+        profile_chats, logs = await load_profile_chats(client, profile)
+        for line in logs:
+            print(line if len(PROFILES) == 1 else f"[{profile.name}] {line}")
+        for chat in profile_chats:
+            chat_id = get_peer_id(chat)
+            if chat_id not in routes:
+                routes[chat_id] = []
+                chats.append(chat)
+            routes[chat_id].append(profile)
+    return chats, routes
+
+
+async def load_profile_chats(client, profile: Profile) -> Tuple[List, List[str]]:
+    return await load_target_chats(
+        client=client,
+        groups_file=profile.groups_file,
+        groups_ids_file=profile.groups_ids_file,
+        cleaned_usernames_file=profile.cleaned_usernames_file,
+        auto_write_cleaned=AUTO_WRITE_CLEANED,
+        max_skip_log=MAX_SKIP_LOG,
+        concurrency=RESOLVE_CONCURRENCY,
+        rate=RESOLVE_RATE,
+        max_flood_wait=MAX_FLOOD_WAIT,
+        progress=print_resolve_progress,
+        cache_ttl=CHANNEL_CACHE_TTL,
+    )
+
+
+def print_resolve_progress(done: int, total: int) -> None:
+    if done == total or done % 100 == 0:
+        print(tr("🔄 Resolved {done}/{total} usernames", done=done, total=total))
+
+
+def print_rules_report(plan: RulePlan) -> None:
+    report = plan.report()
+    print(
+        tr(
+            "📐 Rules {source}: {rules} rules, {keywords} keywords, {lemmas} lemmas, {proximity} proximity rules "
+            "(estimated cost in lookups per message)",
+            source=plan.source,
+            rules=len(report),
+            keywords=plan.matcher.keyword_count,
+            lemmas=sum(len(lemmas) for lemmas in plan.lemmas.values()),
+            proximity=len(plan.proximity.rules),
+        )
+    )
+    for rule in report:
+        print(f"   {rule['name']:<10} {rule['stage']:<6} ~{rule['cost']:<4.0f} {rule['expression']}")
+
+
+def runtime_metrics(
+    pipeline: Pipeline,
+    lemma_cache: LemmaCache,
+    dedup: Optional[NearDuplicateIndex],
+    inline_filters: bool,
+    chat_policy: ChatPolicy,
+):
+    """Collector exposing the stats the bot already keeps, read at scrape time."""
+
+    def metric(name: str, kind: str, help_text: str, rows):
+        return name, kind, help_text, [(name, labels, value) for labels, value in rows]
+
+    def collect():
+        stages = pipeline.stats()
+        for key, kind, help_text in (
+            ("processed", "counter", "Items handled by the stage"),
+            ("dropped", "counter", "Items the stage filtered out"),
+            ("errors", "counter", "Items lost to an exception in the stage"),
+            ("queued", "gauge", "Items waiting in the stage queue"),
+            ("busy", "gauge", "Stage workers currently running"),
+        ):
+            suffix = "_total" if kind == "counter" else ""
+            yield metric(
+                f"lidbot_stage_{key}{suffix}", kind, help_text, [({"stage": st["name"]}, st[key]) for st in stages]
+            )
+        for key, help_text in (("wait", "Queue wait per item"), ("run", "Run time per call")):
+            name = f"lidbot_stage_{key}_seconds"
+            samples = []
+            for st in stages:
+                labels = {"stage": st["name"]}
+                for quantile in ("0.50", "0.95"):
+                    samples.append((name, {**labels, "quantile": quantile}, st[f"{key}_p{quantile[2:4]}"]))
+                samples.append((f"{name}_sum", labels, st[f"{key}_sum"]))
+                samples.append((f"{name}_count", labels, st[f"{key}_count"]))
+            yield name, "summary", f"{help_text}, quantiles over the last 1000 samples", samples
+
+        if inline_filters:
+            cache = lemma_cache.stats()
+            yield metric(
+                "lidbot_lemma_cache_lookups_total",
+                "counter",
+                "Lemma cache lookups by result",
+                [({"result": result}, cache[result]) for result in ("hits", "disk_hits", "misses")],
+            )
+            yield metric(
+                "lidbot_lemma_cache_hit_ratio",
+                "gauge",
+                "Share of lookups served by the cache",
+                [({}, cache["hit_rate"])],
+            )
+            checks = filter_stats()
+            for key, help_text in (
+                ("calls", "Filter check calls"),
+                ("rejections", "Messages rejected by the filter check"),
+                ("seconds", "Estimated CPU seconds spent in the filter check"),
+            ):
+                rows = [({"check": check["name"]}, check[key]) for check in checks]
+                yield metric(f"lidbot_filter_check_{key}_total", "counter", help_text, rows)
+        if dedup is not None:
+            yield metric(
+                "lidbot_dedup_suppressed_total", "counter", "Near-duplicate leads dropped", [({}, dedup.suppressed)]
+            )
+        states = chat_policy.summary()
+        yield metric(
+            "lidbot_chats",
+            "gauge",
+            "Monitored chats by policy state",
+            [({"state": state}, states[state]) for state in STATES],
+        )
+        yield metric(
+            "lidbot_chat_messages_skipped_total",
+            "counter",
+            "Messages of sampled or muted chats that were not checked",
+            [({}, states["skipped"])],
+        )
+
+    return collect
+
+
+async def report_stats(
+    pipeline: Pipeline,
+    lemma_cache: LemmaCache,
+    dedup: Optional[NearDuplicateIndex],
+    inline_filters: bool,
+    chat_meta: ChatMetaCache,
+    deliveries: Dict[str, DeliveryQueue],
+    outbox: Optional[Outbox],
+    chat_policy: ChatPolicy,
+) -> None:
+    while True:
+        await asyncio.sleep(STATS_INTERVAL)
+        print(tr("📈 Pipeline stats:"))
+        for stage in pipeline.stats():
+            print(
+                tr(
+                    "   {name:<8} queue {queued}/{capacity}, busy {busy}/{workers}, done {processed}, "
+                    "dropped {dropped}, errors {errors}, wait p95 {wait_ms:.1f} ms, "
+                    "run p50/p95 {run_p50_ms:.1f}/{run_p95_ms:.1f} ms",
+                    wait_ms=stage["wait_p95"] * 1000,
+                    run_p50_ms=stage["run_p50"] * 1000,
+                    run_p95_ms=stage["run_p95"] * 1000,
+                    **stage,
+                )
+            )
+        if inline_filters:
+            # With FILTER_PROCESSES the counters live in the worker processes
+            cache = lemma_cache.stats()
+            print(
+                tr(
+                    "   lemmas   hit rate {hit_rate:.1%}, in memory {size}, hits {hits}, disk hits {disk_hits}, "
+                    "misses {misses}, evictions {evictions}",
+                    **cache,
+                )
+            )
+            print(tr("   filter checks (in run order):"))
+            for check in filter_stats():
+                print(
+                    tr(
+                        "      {name:<10} calls {calls}, rejected {rejection_rate:.1%}, {cost_us:.1f} us/call, "
+                        "total {seconds:.2f} s",
+                        cost_us=check["cost"] * 1e6,
+                        **check,
+                    )
+                )
+        meta = chat_meta.stats()
+        print(tr("   chats    metadata hit rate {hit_rate:.1%}, cached {size}, misses {misses}", **meta))
+        for name, delivery in deliveries.items():
+            sent = delivery.stats()
+            print(
+                tr(
+                    "   delivery [{name}] leads {leads}, messages {sent} ({digests} digests), pending {pending}, "
+                    "failed {failed}, rate-limit retries {retries}",
+                    name=name,
+                    **sent,
+                )
+            )
+        if outbox is not None:
+            box = outbox.stats()
+            print(
+                tr(
+                    "   outbox   undelivered {undelivered}, delivered {delivered}, retried {retried}, "
+                    "recovered {recovered}, added {added}, commits {commits}",
+                    **box,
+                )
+            )
+        if dedup is not None:
+            print(
+                tr(
+                    "   dedup    suppressed {suppressed} of {seen} leads, tracked {tracked}",
+                    suppressed=dedup.suppressed,
+                    seen=dedup.seen,
+                    tracked=len(dedup),
+                )
+            )
+        states = chat_policy.summary()
+        print(
+            tr(
+                "   policy   active {active}, sampled {sampled}, muted {muted}, skipped {skipped} messages, "
+                "demoted {demoted}, promoted {promoted}",
+                **states,
+            )
+        )
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        print(tr("Stopped via Ctrl-C"))
+    except Exception as exc:
+        print(tr("Fatal error in main():"), exc)
+
@@ -0,0 +1,109 @@
+import time
+from typing import Any, Callable, Dict, List, Sequence
+
+
+class FilterStage:
+    """A named rejection check with call/rejection counters and sampled timing."""
+
+    __slots__ = (
+        "name", "reject", "calls", "rejections", "timed_calls", "timed_seconds", "sampled", "sampled_rejections",
+    )
+
+    def __init__(self, name: str, reject: Callable[[Any], bool]):
+        self.name = name
+        self.reject = reject
+        self.calls = 0
+        self.rejections = 0
+        self.timed_calls = 0
+        self.timed_seconds = 0.0
+        # Rejections among sampled items that every stage was run on, whatever the order
+        self.sampled = 0
+        self.sampled_rejections = 0
+
+    @property
+    def cost(self) -> float:
+        """Mean seconds per call, from the timed sample."""
+        return self.timed_seconds / self.timed_calls if self.timed_calls else 0.0
+
+    @property
+    def rejection_rate(self) -> float:
+        """Share rejected of the items that reached this stage, so it depends on the stages before it."""
+        return self.rejections / self.calls if self.calls else 0.0
+
+    @property
+    def sampled_rejection_rate(self) -> float:
+        return self.sampled_rejections / self.sampled if self.sampled else 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "calls": self.calls,
+            "rejections": self.rejections,
+            "rejection_rate": self.rejection_rate,
+            "cost": self.cost,
+            "seconds": self.cost * self.calls,
+        }
+
+
+class FilterCascade:
+    """
+    Runs independent stages in order until one rejects, timing every `sample_every`-th call.
+    `adaptive` runs every stage on sampled items and reorders by their rejections per second.
+    """
+
+    def __init__(
+        self,
+        stages: Sequence[FilterStage],
+        adaptive: bool = False,
+        reorder_every: int = 1000,
+        sample_every: int = 16,
+    ):
+        self.stages: List[FilterStage] = list(stages)
+        self.adaptive = adaptive
+        self.reorder_every = max(1, reorder_every)
+        self.sample_every = max(1, sample_every)
+        self.items = 0
+
+    def rejects(self, item: Any) -> bool:
+        self.items += 1
+        if self.adaptive:
+            if self.items % self.reorder_every == 0:
+                self.reorder()
+            if self.items % self.sample_every == 0:
+                return self._sample(item)
+        for stage in self.stages:
+            stage.calls += 1
+            if stage.calls % self.sample_every == 0:
+                started = time.perf_counter()
+                rejected = stage.reject(item)
+                stage.timed_seconds += time.perf_counter() - started
+                stage.timed_calls += 1
+            else:
+                rejected = stage.reject(item)
+            if rejected:
+                stage.rejections += 1
+                return True
+        return False
+
+    def reorder(self) -> None:
+        # Stages without a timed sample yet keep their place at the front.
+        self.stages.sort(key=lambda stage: -stage.sampled_rejection_rate / stage.cost if stage.cost else float("-inf"))
+
+    def _sample(self, item: Any) -> bool:
+        """Time every stage on `item`; the in-order counters only see the stages that would have run."""
+        rejected = False
+        for stage in self.stages:
+            started = time.perf_counter()
+            stage_rejects = stage.reject(item)
+            stage.timed_seconds += time.perf_counter() - started
+            stage.timed_calls += 1
+            stage.sampled += 1
+            stage.sampled_rejections += stage_rejects
+            if not rejected:
+                stage.calls += 1
+                stage.rejections += stage_rejects
+                rejected = bool(stage_rejects)
+        return rejected
+
+    def stats(self) -> List[Dict[str, Any]]:
+        return [stage.stats() for stage in self.stages]
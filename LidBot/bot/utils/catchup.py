@@ -0,0 +1,149 @@
+import asyncio
+import json
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from telethon.errors import FloodWaitError
+from telethon.utils import get_peer_id
+
+from .files import write_atomic
+from .i18n import tr
+from .ratelimit import TokenBucket
+
+ProgressCallback = Callable[[int, int], None]
+
+# iter_messages fetches history in pages of this many messages, one request each
+PAGE_SIZE = 100
+
+
+class LastSeenStore:
+    """
+    Highest message id taken in per chat, kept in a JSON file so the next
+    start knows where each chat's history has to be picked up. update()
+    only ever raises an id; save() rewrites the file atomically, and only
+    if something changed.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._ids: Dict[int, int] = {}
+        self._dirty = False
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def load(self) -> int:
+        if not self.path.exists():
+            return 0
+        data = json.loads(self.path.read_text(encoding="utf-8") or "{}")
+        self._ids = {int(chat_id): int(message_id) for chat_id, message_id in data.get("chats", {}).items()}
+        return len(self._ids)
+
+    def get(self, chat_id: int) -> Optional[int]:
+        return self._ids.get(chat_id)
+
+    def update(self, chat_id: int, message_id: int) -> None:
+        if message_id > self._ids.get(chat_id, 0):
+            self._ids[chat_id] = message_id
+            self._dirty = True
+
+    def snapshot(self) -> Dict[int, int]:
+        return dict(self._ids)
+
+    def save(self) -> bool:
+        if not self._dirty:
+            return False
+        payload = {"version": 1, "chats": {str(chat_id): message_id for chat_id, message_id in self._ids.items()}}
+        write_atomic(self.path, json.dumps(payload))
+        self._dirty = False
+        return True
+
+
+async def catch_up(
+    client,
+    chats: List[Any],
+    last_ids: Dict[int, int],
+    submit: Callable[[Any], Awaitable[None]],
+    record: Callable[[int, int], None],
+    concurrency: int = 8,
+    rate: float = 3.0,
+    limit: int = 500,
+    max_age: Optional[float] = None,
+    max_flood_wait: int = 900,
+    progress: Optional[ProgressCallback] = None,
+    live_ids: Optional[Dict[int, int]] = None,
+    own_peers: bool = False,
+) -> Dict[str, int]:
+    """
+    Pass every message posted after `last_ids[chat]` to `submit`, oldest
+    first: at most the newest `limit` per chat and none older than
+    `max_age` seconds. `live_ids` is read as each chat is reached and holds
+    the first id live updates brought for it, where its gap ends.
+    `concurrency` chats are read at a time and every history page takes a
+    token from a bucket refilled at `rate` per second; a FloodWait pauses
+    all readers and the chat is read again. A chat with no stored id has
+    never been seen, so only its newest id goes to `record`, to continue
+    from next time. With `own_peers` every chat is looked up in `client`'s
+    own entity cache first, for chats resolved by another account: an
+    access hash is only valid for the account that received it.
+    """
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    bucket = TokenBucket(rate, capacity=max(1, concurrency))
+    since = datetime.now(timezone.utc) - timedelta(seconds=max_age) if max_age else None
+    stats = {"chats": len(chats), "messages": 0, "new_chats": 0, "failed": 0}
+    total = len(chats)
+    done = 0
+
+    async def read(chat, min_id: int, max_id: int) -> List[Any]:
+        # Newest first, so `limit` and `max_age` keep the most recent part of the gap
+        messages = []
+        async for message in client.iter_messages(chat, limit=limit, min_id=min_id, max_id=max_id):
+            if since is not None and message.date < since:
+                break
+            messages.append(message)
+            if len(messages) % PAGE_SIZE == 0:
+                await bucket.acquire()
+        messages.reverse()
+        return messages
+
+    async def one(chat) -> None:
+        nonlocal done
+        try:
+            chat_id = get_peer_id(chat)
+        except Exception:
+            chat_id = None
+        async with semaphore:
+            while True:
+                await bucket.acquire()
+                try:
+                    if own_peers and chat_id is not None:
+                        chat = await client.get_input_entity(chat_id)
+                    if chat_id is None or chat_id not in last_ids:
+                        async for message in client.iter_messages(chat, limit=1):
+                            if chat_id is not None:
+                                record(chat_id, message.id)
+                        stats["new_chats"] += 1
+                    else:
+                        # Everything from the first live id on has come through the handlers already
+                        max_id = live_ids.get(chat_id, 0) if live_ids is not None else 0
+                        for message in await read(chat, last_ids[chat_id], max_id):
+                            stats["messages"] += 1
+                            await submit(message)
+                    break
+                except FloodWaitError as exc:
+                    if exc.seconds > max_flood_wait:
+                        stats["failed"] += 1
+                        print(tr("⚠️ Catch-up of chat {chat} skipped:", chat=chat_id or chat), exc)
+                        break
+                    bucket.pause(exc.seconds)
+                except Exception as exc:
+                    stats["failed"] += 1
+                    print(tr("⚠️ Catch-up of chat {chat} failed:", chat=chat_id or chat), repr(exc))
+                    break
+        done += 1
+        if progress is not None:
+            progress(done, total)
+
+    await asyncio.gather(*(one(chat) for chat in chats))
+    return stats
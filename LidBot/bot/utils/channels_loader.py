@@ -0,0 +1,291 @@
+import asyncio
+import json
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from telethon.errors import FloodWaitError, UsernameNotOccupiedError
+from telethon.tl.types import InputPeerChannel, InputPeerChat, InputPeerUser
+from telethon.utils import get_peer_id
+
+from .filters import extract_username
+from .files import write_atomic
+from .i18n import tr
+from .ratelimit import TokenBucket
+
+ProgressCallback = Callable[[int, int], None]
+
+CACHE_VERSION = 2
+STATUS_OK = "ok"
+STATUS_NOT_FOUND = "not_found"
+STATUS_FAILED = "failed"
+
+
+async def load_target_chats(
+    client,
+    groups_file: Path,
+    groups_ids_file: Path,
+    cleaned_usernames_file: Path,
+    auto_write_cleaned: bool,
+    max_skip_log: int,
+    concurrency: int = 8,
+    rate: float = 2.0,
+    max_flood_wait: int = 900,
+    progress: Optional[ProgressCallback] = None,
+    cache_ttl: float = 7 * 24 * 3600,
+) -> Tuple[List, List[str]]:
+    """
+    Resolve the username list against the channel cache: only usernames that
+    are new, older than `cache_ttl` seconds or failed last time hit Telegram,
+    the rest are rebuilt from the cached id/access_hash.
+    Returns (valid_chats, log_messages).
+    """
+    logs: List[str] = []
+    valid_chats: List = []
+    valid_usernames: List[str] = []
+
+    entries: Dict[str, Dict[str, Any]] = {}
+    legacy_ids: List[int] = []
+    if groups_ids_file.exists():
+        try:
+            entries, legacy_ids = _read_id_cache(groups_ids_file)
+        except Exception as exc:
+            logs.append(tr("⚠️ Failed to read {path}: {error}", path=groups_ids_file, error=exc))
+
+    if not groups_file.exists():
+        for entry in entries.values():
+            peer = _entry_to_peer(entry)
+            if peer is not None:
+                valid_chats.append(peer)
+            elif entry.get("status") in (None, STATUS_OK) and "id" in entry:
+                valid_chats.append(entry["id"])
+        valid_chats.extend(legacy_ids)
+        if not valid_chats:
+            logs.append(tr("❌ {path} is missing and ID cache is empty.", path=groups_file))
+            return [], logs
+        logs.append(tr("📗 Loaded {count} channel IDs from {path}", count=len(valid_chats), path=groups_ids_file))
+        return valid_chats, logs
+
+    usernames = [
+        extract_username(line)
+        for line in groups_file.read_text(encoding="utf-8").splitlines()
+    ]
+    usernames = list(dict.fromkeys(u for u in usernames if u))
+    if not usernames and not legacy_ids:
+        logs.append(tr("❌ No usernames found in all_channels.txt and no IDs available."))
+        return [], logs
+
+    logs.append(tr("📊 Channels/chats listed: {count}", count=len(usernames)))
+    now = time.time()
+    to_resolve = [u for u in usernames if not _is_fresh(entries.get(u), now, cache_ttl)]
+    cached = len(usernames) - len(to_resolve)
+    logs.append(tr("📗 From cache: {cached}, to resolve: {count}", cached=cached, count=len(to_resolve)))
+    skipped = skipped_logged = 0
+
+    resolved = await resolve_usernames(client, to_resolve, concurrency, rate, max_flood_wait, progress)
+    resolved_at = time.time()
+    resolved_now = set(to_resolve)
+    peers: Dict[str, Any] = {}
+    for username, entity, error in resolved:
+        if error is None:
+            entries[username] = _peer_to_entry(entity, resolved_at)
+            peers[username] = entity
+            continue
+        if isinstance(error, UsernameNotOccupiedError):
+            status = STATUS_NOT_FOUND
+            reason = tr("username @{username} is free/not found", username=username)
+        elif isinstance(error, ValueError):
+            status = STATUS_NOT_FOUND
+            reason = tr("cannot resolve @{username}", username=username)
+        else:
+            status = STATUS_FAILED
+            reason = tr("error for @{username}: {error}", username=username, error=error)
+        entries[username] = {"status": status, "resolved_at": resolved_at}
+        skipped += 1
+        skipped_logged = _log_skip(logs, skipped_logged, max_skip_log, reason)
+
+    for username in usernames:
+        peer = peers.get(username) or _entry_to_peer(entries[username])
+        if peer is not None:
+            valid_chats.append(peer)
+            valid_usernames.append(username)
+        elif username not in resolved_now:
+            skipped += 1
+    seen_ids = set()
+    for peer in valid_chats:
+        try:
+            seen_ids.add(get_peer_id(peer))
+        except Exception:
+            pass
+    valid_chats.extend(cid for cid in legacy_ids if cid not in seen_ids)
+
+    if to_resolve or set(entries) != set(usernames):
+        try:
+            _write_id_cache(groups_ids_file, {u: entries[u] for u in usernames}, legacy_ids)
+        except Exception as exc:
+            logs.append(tr("⚠️ Failed to write {path}: {error}", path=groups_ids_file, error=exc))
+
+    if not valid_chats:
+        logs.append(tr("❌ No valid channels/chats to monitor."))
+        return [], logs
+
+    logs.append(tr("✅ Monitoring {count} chats. Skipped: {skipped}", count=len(valid_chats), skipped=skipped))
+    if skipped > skipped_logged:
+        logs.append(tr("ℹ️ Additional skips without logs: {count}", count=skipped - skipped_logged))
+
+    if auto_write_cleaned and valid_usernames:
+        try:
+            cleaned_usernames_file.write_text(
+                "\n".join(f"@{name}" for name in valid_usernames),
+                encoding="utf-8",
+            )
+            logs.append(tr("💾 Saved valid usernames to {path}", path=cleaned_usernames_file))
+        except Exception as exc:
+            logs.append(tr("⚠️ Failed to write {path}: {error}", path=cleaned_usernames_file, error=exc))
+
+    return valid_chats, logs
+
+
+async def resolve_usernames(
+    client,
+    usernames: List[str],
+    concurrency: int = 8,
+    rate: float = 2.0,
+    max_flood_wait: int = 900,
+    progress: Optional[ProgressCallback] = None,
+) -> List[Tuple[str, Any, Optional[Exception]]]:
+    """
+    Resolve usernames concurrently: at most `concurrency` requests in flight
+    and `rate` requests per second overall. A FloodWait pauses every worker
+    for the requested time and the username is retried; only waits longer
+    than `max_flood_wait` seconds give up. Returns (username, entity, error)
+    in input order.
+    """
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    bucket = TokenBucket(rate, capacity=max(1, concurrency))
+    total = len(usernames)
+    done = 0
+
+    async def resolve(username: str) -> Tuple[str, Any, Optional[Exception]]:
+        nonlocal done
+        async with semaphore:
+            while True:
+                await bucket.acquire()
+                try:
+                    result = (username, await client.get_input_entity(username), None)
+                    break
+                except FloodWaitError as exc:
+                    if exc.seconds > max_flood_wait:
+                        result = (username, None, exc)
+                        break
+                    bucket.pause(exc.seconds)
+                except Exception as exc:
+                    result = (username, None, exc)
+                    break
+        done += 1
+        if progress is not None:
+            progress(done, total)
+        return result
+
+    return list(await asyncio.gather(*(resolve(username) for username in usernames)))
+
+
+def _read_id_cache(path: Path) -> Tuple[Dict[str, Dict[str, Any]], List[int]]:
+    """
+    Returns (username -> cache entry, bare ids). Besides the current keyed
+    format this accepts the older ones: a JSON list of ids, one id per line,
+    or {"channels": {username: id}}; such entries have no access_hash and
+    are re-resolved once.
+    """
+    content = path.read_text(encoding="utf-8").strip()
+    if not content:
+        return {}, []
+
+    try:
+        parsed = json.loads(content)
+    except Exception:
+        parsed = None
+
+    entries: Dict[str, Dict[str, Any]] = {}
+    ids: List[int] = []
+    if isinstance(parsed, dict) and "channels" in parsed:
+        for username, item in parsed.get("channels", {}).items():
+            if isinstance(item, dict) and item.get("status"):
+                entries[username] = item
+                continue
+            cid: List[int] = []
+            _append_int(cid, item.get("id") if isinstance(item, dict) else item)
+            if cid:
+                entries[username] = {"id": cid[0]}
+        for item in parsed.get("ids", []):
+            _append_int(ids, item)
+    elif isinstance(parsed, list):
+        for item in parsed:
+            _append_int(ids, item)
+    else:
+        for line in content.splitlines():
+            line = line.strip()
+            if line and not line.startswith("@"):
+                _append_int(ids, line)
+    return entries, ids
+
+
+def _write_id_cache(path: Path, entries: Dict[str, Dict[str, Any]], ids: List[int]) -> None:
+    payload: Dict[str, Any] = {"version": CACHE_VERSION, "channels": entries}
+    if ids:
+        payload["ids"] = ids
+    write_atomic(path, json.dumps(payload, ensure_ascii=False, indent=1))
+
+
+def _is_fresh(entry: Optional[Dict[str, Any]], now: float, ttl: float) -> bool:
+    # Free usernames are rechecked after `ttl` like resolved ones; errors are retried every start.
+    if not entry or entry.get("status") == STATUS_FAILED:
+        return False
+    if entry.get("status") == STATUS_OK and _entry_to_peer(entry) is None:
+        return False
+    return now - float(entry.get("resolved_at", 0)) < ttl
+
+
+def _peer_to_entry(peer, resolved_at: float) -> Dict[str, Any]:
+    entry: Dict[str, Any] = {"status": STATUS_OK, "resolved_at": resolved_at}
+    if isinstance(peer, InputPeerChannel):
+        entry.update(type="channel", id=peer.channel_id, access_hash=peer.access_hash)
+    elif isinstance(peer, InputPeerChat):
+        entry.update(type="chat", id=peer.chat_id)
+    elif isinstance(peer, InputPeerUser):
+        entry.update(type="user", id=peer.user_id, access_hash=peer.access_hash)
+    else:
+        # Not something we can rebuild from ids; resolve it again next time.
+        entry["status"] = STATUS_FAILED
+    return entry
+
+
+def _entry_to_peer(entry: Dict[str, Any]):
+    if entry.get("status") != STATUS_OK:
+        return None
+    try:
+        kind = entry.get("type")
+        if kind == "channel":
+            return InputPeerChannel(int(entry["id"]), int(entry["access_hash"]))
+        if kind == "chat":
+            return InputPeerChat(int(entry["id"]))
+        if kind == "user":
+            return InputPeerUser(int(entry["id"]), int(entry["access_hash"]))
+    except (KeyError, TypeError, ValueError):
+        pass
+    return None
+
+
+def _append_int(target: List[int], value) -> None:
+    try:
+        target.append(int(value))
+    except Exception:
+        pass
+
+
+def _log_skip(logs: List[str], logged: int, max_logged: int, text: str) -> int:
+    if logged < max_logged:
+        logs.append(tr("⚠️ Skipping {reason}", reason=text))
+        return logged + 1
+    return logged
+
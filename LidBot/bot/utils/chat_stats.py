@@ -0,0 +1,206 @@
+import json
+import time
+from array import array
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List
+
+from .files import write_atomic
+
+ACTIVE, SAMPLED, MUTED = 0, 1, 2
+STATES = ("active", "sampled", "muted")
+
+# Column name -> array typecode; every column holds one value per row
+_COLUMNS = (
+    ("messages", "Q"),
+    ("checked", "Q"),
+    ("passed", "Q"),
+    ("leads", "Q"),
+    ("quiet", "Q"),
+    ("seconds", "d"),
+    ("first_seen", "d"),
+    ("last_passed", "d"),
+    ("state", "B"),
+)
+
+
+class ChatStats:
+    """Per-chat messages, checks, passes, leads, CPU seconds and ChatPolicy state in parallel arrays."""
+
+    def __init__(self):
+        self._rows: Dict[int, int] = {}
+        self.ids = array("q")
+        self.messages = array("Q")
+        self.checked = array("Q")
+        self.passed = array("Q")
+        self.leads = array("Q")
+        self.quiet = array("Q")
+        self.seconds = array("d")
+        self.first_seen = array("d")
+        self.last_passed = array("d")
+        self.state = array("B")
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def row(self, chat_id: int) -> int:
+        row = self._rows.get(chat_id)
+        if row is None:
+            row = self._rows[chat_id] = len(self.ids)
+            self.ids.append(chat_id)
+            for name, _ in _COLUMNS:
+                getattr(self, name).append(0)
+            self.first_seen[row] = time.time()
+        return row
+
+    def spent(self, chat_id: int, seconds: float) -> None:
+        self.seconds[self.row(chat_id)] += seconds
+
+    def lead(self, chat_id: int) -> None:
+        self.leads[self.row(chat_id)] += 1
+
+    def count(self, state: int) -> int:
+        return self.state.count(state)
+
+    def retain(self, chat_ids: Iterable[int]) -> int:
+        """Forget chats that are no longer monitored; returns how many were dropped."""
+        keep = set(chat_ids)
+        rows = [row for row, chat_id in enumerate(self.ids) if chat_id in keep]
+        dropped = len(self.ids) - len(rows)
+        if dropped:
+            self.ids = array("q", (self.ids[row] for row in rows))
+            for name, typecode in _COLUMNS:
+                column = getattr(self, name)
+                setattr(self, name, array(typecode, (column[row] for row in rows)))
+            self._rows = {chat_id: row for row, chat_id in enumerate(self.ids)}
+        return dropped
+
+    def rows(self) -> List[Dict[str, Any]]:
+        now = time.time()
+        return [
+            {
+                "chat_id": chat_id,
+                "state": STATES[self.state[row]],
+                "messages": self.messages[row],
+                "per_hour": self.messages[row] * 3600 / max(now - self.first_seen[row], 3600),
+                "checked": self.checked[row],
+                "passed": self.passed[row],
+                "leads": self.leads[row],
+                "seconds": self.seconds[row],
+                "last_passed": self.last_passed[row] or None,
+            }
+            for row, chat_id in enumerate(self.ids)
+        ]
+
+    def load(self, path: Path) -> int:
+        if not path.exists():
+            return 0
+        data = json.loads(path.read_text(encoding="utf-8") or "{}")
+        names = data.get("columns", [])
+        known = {name for name, _ in _COLUMNS}
+        for chat_id, values in data.get("chats", {}).items():
+            row = self.row(int(chat_id))
+            for name, value in zip(names, values):
+                if name in known:
+                    getattr(self, name)[row] = value
+        return len(self)
+
+    def save(self, path: Path) -> None:
+        names = [name for name, _ in _COLUMNS]
+        columns = [getattr(self, name) for name in names]
+        payload = {
+            "version": 1,
+            "columns": names,
+            "chats": {str(chat_id): [column[row] for column in columns] for row, chat_id in enumerate(self.ids)},
+        }
+        write_atomic(path, json.dumps(payload))
+
+
+class ChatPolicy:
+    """
+    Checks one in `sample_every` messages of a chat after `quiet_after` checked ones without a pass,
+    then one in `probe_every`; a passing message makes the chat active again.
+    """
+
+    def __init__(
+        self,
+        stats: ChatStats,
+        enabled: bool = False,
+        quiet_after: int = 500,
+        sample_every: int = 10,
+        probe_every: int = 100,
+    ):
+        self.stats = stats
+        self.enabled = enabled
+        self.quiet_after = max(1, quiet_after)
+        self._every = (1, max(1, sample_every), max(1, probe_every))
+        self.skipped = 0
+        self.demoted = 0
+        self.promoted = 0
+
+    def admit(self, chat_id: int) -> bool:
+        stats = self.stats
+        row = stats.row(chat_id)
+        stats.messages[row] += 1
+        state = stats.state[row]
+        if state != ACTIVE and stats.messages[row] % self._every[state]:
+            self.skipped += 1
+            return False
+        stats.checked[row] += 1
+        stats.quiet[row] += 1
+        if self.enabled and state != MUTED and stats.quiet[row] >= self.quiet_after:
+            stats.state[row] = state + 1
+            stats.quiet[row] = 0
+            self.demoted += 1
+        return True
+
+    def passed(self, chat_id: int) -> None:
+        stats = self.stats
+        row = stats.row(chat_id)
+        stats.passed[row] += 1
+        stats.last_passed[row] = time.time()
+        stats.quiet[row] = 0
+        if stats.state[row] != ACTIVE:
+            stats.state[row] = ACTIVE
+            self.promoted += 1
+
+    def reset(self) -> int:
+        """Back to active for every chat, e.g. when the policy was turned off; returns how many moved."""
+        moved = len(self.stats) - self.stats.count(ACTIVE)
+        for row in range(len(self.stats)):
+            self.stats.state[row] = ACTIVE
+        return moved
+
+    def summary(self) -> Dict[str, int]:
+        counts = {name: self.stats.count(state) for state, name in enumerate(STATES)}
+        counts.update(skipped=self.skipped, demoted=self.demoted, promoted=self.promoted)
+        return counts
+
+
+def write_report(path: Path, stats: ChatStats, name_of: Callable[[int], str]) -> None:
+    """A tab-separated table of every chat, never-passed and costliest first; `name_of` gives its name."""
+    rows = sorted(stats.rows(), key=lambda row: (row["passed"] > 0, -row["seconds"], -row["messages"]))
+    lines = [
+        f"# {datetime.now().isoformat(timespec='seconds')}: {len(rows)} chats, never passed first, by CPU seconds",
+        "state\tchat_id\tchat\tmessages\tper_hour\tchecked\tpassed\tpass_rate\tleads\tcpu_seconds\tlast_passed",
+    ]
+    for row in rows:
+        last = row["last_passed"]
+        lines.append(
+            "\t".join(
+                (
+                    row["state"],
+                    str(row["chat_id"]),
+                    name_of(row["chat_id"]),
+                    str(row["messages"]),
+                    f"{row['per_hour']:.1f}",
+                    str(row["checked"]),
+                    str(row["passed"]),
+                    f"{row['passed'] / row['checked']:.4f}" if row["checked"] else "",
+                    str(row["leads"]),
+                    f"{row['seconds']:.3f}",
+                    datetime.fromtimestamp(last).isoformat(timespec="seconds") if last else "",
+                )
+            )
+        )
+    write_atomic(path, "\n".join(lines) + "\n")
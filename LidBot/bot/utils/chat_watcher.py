@@ -0,0 +1,80 @@
+import asyncio
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, Iterable, Optional, Sequence, Set, Tuple
+
+from telethon.utils import get_peer_id
+
+FileState = Optional[Tuple[int, int]]
+
+
+class ChatSet:
+    """
+    The set of monitored chat IDs (marked, as in `event.chat_id`). The
+    message handler only checks membership, so the list can be swapped
+    while the client keeps running.
+    """
+
+    def __init__(self, chats: Iterable = ()):
+        self.ids: Set[int] = _peer_ids(chats)
+
+    def __contains__(self, chat_id) -> bool:
+        return chat_id in self.ids
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def replace(self, chats: Iterable) -> Tuple[Set[int], Set[int]]:
+        """Swap in a new chat list; returns (added, removed) IDs."""
+        ids = _peer_ids(chats)
+        added, removed = ids - self.ids, self.ids - ids
+        self.ids = ids
+        return added, removed
+
+
+class FileWatcher:
+    """
+    Polls the mtime/size of `paths` and awaits `on_change` when any of them
+    differs from the last snapshot. The snapshot is retaken after the
+    callback, so files the callback rewrites itself (the ID cache) do not
+    trigger another reload.
+    """
+
+    def __init__(self, paths: Sequence[Path], on_change: Callable[[], Awaitable[None]], interval: float = 30.0):
+        self.paths = list(paths)
+        self.on_change = on_change
+        self.interval = interval
+        self._state = self.snapshot()
+
+    def snapshot(self) -> Dict[Path, FileState]:
+        return {path: _file_state(path) for path in self.paths}
+
+    def changed(self) -> bool:
+        return self.snapshot() != self._state
+
+    async def run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            if not self.changed():
+                continue
+            try:
+                await self.on_change()
+            finally:
+                self._state = self.snapshot()
+
+
+def _file_state(path: Path) -> FileState:
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _peer_ids(chats: Iterable) -> Set[int]:
+    ids: Set[int] = set()
+    for chat in chats:
+        try:
+            ids.add(get_peer_id(chat))
+        except (TypeError, ValueError):
+            pass
+    return ids
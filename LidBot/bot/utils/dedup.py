@@ -0,0 +1,99 @@
+import hashlib
+import re
+import time
+from collections import deque
+from typing import Deque, Dict, Hashable, List, Optional, Tuple
+
+WORD_RE = re.compile(r"[^\W_]+")
+
+BITS = 64
+BANDS = 4
+_BAND_BITS = BITS // BANDS
+_BAND_MASK = (1 << _BAND_BITS) - 1
+
+
+def simhash(text: str, shingle: int = 2) -> int:
+    """64-bit SimHash over word `shingle`-grams of the lowercased text."""
+    words = WORD_RE.findall(text.lower())
+    if len(words) < shingle:
+        grams = words
+    else:
+        grams = [" ".join(words[i:i + shingle]) for i in range(len(words) - shingle + 1)]
+    if not grams:
+        return 0
+    # One bit string per shingle; column i of the zip counts the shingles with bit i set.
+    rows = [
+        format(int.from_bytes(hashlib.blake2b(gram.encode("utf-8"), digest_size=8).digest(), "big"), "064b")
+        for gram in grams
+    ]
+    half = len(rows) / 2
+    fingerprint = 0
+    for column in zip(*rows):
+        fingerprint = fingerprint << 1 | (column.count("1") > half)
+    return fingerprint
+
+
+def _bands(fingerprint: int) -> List[Tuple[int, int]]:
+    return [(band, fingerprint >> (band * _BAND_BITS) & _BAND_MASK) for band in range(BANDS)]
+
+
+class NearDuplicateIndex:
+    """
+    Remembers SimHash fingerprints of recent texts for `ttl` seconds (at
+    most `maxsize` of them) and flags texts within `max_distance` bits of
+    one already seen. Fingerprints are bucketed by four 16-bit bands: two
+    hashes at most 3 bits apart share at least one band exactly, so a lookup
+    only compares against the few entries in four buckets. Texts are only
+    compared within the same `scope`, e.g. the destination they go to.
+    """
+
+    def __init__(self, ttl: float = 3600.0, maxsize: int = 10000, max_distance: int = 3):
+        if max_distance >= BANDS:
+            raise ValueError(f"max_distance must be below {BANDS} for banded lookup")
+        self.ttl = ttl
+        self.maxsize = max(1, maxsize)
+        self.max_distance = max_distance
+        self.seen = 0
+        self.suppressed = 0
+        self._entries: Deque[Tuple[float, Hashable, int]] = deque()
+        self._buckets: Dict[Tuple[Hashable, int, int], List[int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def check(self, text: str, scope: Hashable = None, now: Optional[float] = None) -> bool:
+        """Return True if `text` is new in `scope` (and remember it), False for a near-duplicate."""
+        now = time.monotonic() if now is None else now
+        self._expire(now)
+        self.seen += 1
+        fingerprint = simhash(text)
+        keys = [(scope, band, value) for band, value in _bands(fingerprint)]
+        for key in keys:
+            for other in self._buckets.get(key, ()):
+                if bin(fingerprint ^ other).count("1") <= self.max_distance:
+                    self.suppressed += 1
+                    return False
+        self._entries.append((now, scope, fingerprint))
+        for key in keys:
+            self._buckets.setdefault(key, []).append(fingerprint)
+        if len(self._entries) > self.maxsize:
+            self._evict()
+        return True
+
+    def stats(self) -> Dict[str, int]:
+        return {"size": len(self._entries), "seen": self.seen, "suppressed": self.suppressed}
+
+    def _expire(self, now: float) -> None:
+        while self._entries and now - self._entries[0][0] > self.ttl:
+            self._evict()
+
+    def _evict(self) -> None:
+        _, scope, fingerprint = self._entries.popleft()
+        for band, value in _bands(fingerprint):
+            key = (scope, band, value)
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                continue
+            bucket.remove(fingerprint)
+            if not bucket:
+                del self._buckets[key]
@@ -0,0 +1,165 @@
+import asyncio
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, List, Optional, Sequence, Tuple
+
+from telethon.errors import FloodWaitError
+
+from .i18n import tr
+from .notifier import RetryAfter
+
+MAX_MESSAGE_CHARS = 4096
+DIGEST_SEPARATOR = "\n\n➖➖➖\n\n"
+
+
+class DeliveryQueue:
+    """
+    Sends notifications through `send`, at most `rate_per_minute` of them in
+    any 60 seconds. While the budget lasts every lead goes out on its own;
+    once more leads are waiting than the budget allows, the queue waits
+    `flush_interval` seconds for the burst to settle and packs what is
+    pending into digests of up to `max_chars`, no more of them than the
+    budget left; the rest waits for the next window. A 429 `retry_after` (or a
+    FloodWait on the fallback) pauses sending and the same message is retried.
+
+    A notification can carry a `key`; once the message holding it has been
+    sent, or has failed, `on_sent`/`on_failed` get the keys it contained.
+    """
+
+    def __init__(
+        self,
+        send: Callable[[str], Awaitable[None]],
+        rate_per_minute: int = 20,
+        flush_interval: float = 3.0,
+        max_chars: int = MAX_MESSAGE_CHARS,
+        digest_header: str = "📦 {count} leads",
+        on_sent: Optional[Callable[[List[Any]], None]] = None,
+        on_failed: Optional[Callable[[List[Any]], None]] = None,
+    ):
+        self.send = send
+        self.rate_per_minute = rate_per_minute
+        self.flush_interval = flush_interval
+        self.max_chars = max_chars
+        self.digest_header = digest_header
+        self.on_sent = on_sent
+        self.on_failed = on_failed
+        self.leads = 0
+        self.sent = 0
+        self.digests = 0
+        self.failed = 0
+        self.retries = 0
+        self._pending: Deque[Tuple[str, Any]] = deque()
+        self._sent_at: Deque[float] = deque()
+        self._wakeup = asyncio.Event()
+        self._task = None
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    def put(self, notification: str, key: Any = None) -> None:
+        self._pending.append((notification, key))
+        self.leads += 1
+        self._wakeup.set()
+
+    async def close(self, timeout: float = 10.0) -> None:
+        """Stop the sender and try to get whatever is still pending out as digests."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self._pending:
+            try:
+                await asyncio.wait_for(self._send_all(self._coalesce()), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    def stats(self) -> dict:
+        return {
+            "pending": len(self._pending),
+            "leads": self.leads,
+            "sent": self.sent,
+            "digests": self.digests,
+            "failed": self.failed,
+            "retries": self.retries,
+        }
+
+    async def _run(self) -> None:
+        while True:
+            if not self._pending:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+            budget = self._budget()
+            if budget <= 0:
+                await asyncio.sleep(min(self.flush_interval, self._until_budget()))
+                continue
+            if len(self._pending) > budget:
+                await asyncio.sleep(self.flush_interval)
+                await self._send_all(self._coalesce(self._budget()))
+            else:
+                text, key = self._pending.popleft()
+                await self._send_all([(text, [] if key is None else [key])])
+
+    def _budget(self) -> int:
+        if self.rate_per_minute <= 0:
+            return len(self._pending)
+        now = time.monotonic()
+        while self._sent_at and now - self._sent_at[0] >= 60:
+            self._sent_at.popleft()
+        return self.rate_per_minute - len(self._sent_at)
+
+    def _until_budget(self) -> float:
+        return max(0.05, 60 - (time.monotonic() - self._sent_at[0])) if self._sent_at else 0.05
+
+    def _coalesce(self, limit: Optional[int] = None) -> List[Tuple[str, List[Any]]]:
+        """
+        Pack the pending notifications, in order, into as few messages as fit;
+        with `limit`, into at most that many, leaving the rest pending.
+        """
+        groups: List[List[Tuple[str, Any]]] = []
+        size = 0
+        while self._pending:
+            item = self._pending[0]
+            if groups and size + len(DIGEST_SEPARATOR) + len(item[0]) <= self.max_chars - 64:
+                groups[-1].append(item)
+                size += len(DIGEST_SEPARATOR) + len(item[0])
+            elif limit is not None and len(groups) >= limit:
+                break
+            else:
+                groups.append([item])
+                size = len(item[0])
+            self._pending.popleft()
+        messages = []
+        for group in groups:
+            keys = [key for _, key in group if key is not None]
+            if len(group) == 1:
+                messages.append((group[0][0], keys))
+            else:
+                self.digests += 1
+                header = self.digest_header.format(count=len(group))
+                messages.append((header + DIGEST_SEPARATOR + DIGEST_SEPARATOR.join(text for text, _ in group), keys))
+        return messages
+
+    async def _send_all(self, messages: Sequence[Tuple[str, List[Any]]]) -> None:
+        for message, keys in messages:
+            while True:
+                try:
+                    await self.send(message)
+                except (RetryAfter, FloodWaitError) as exc:
+                    self.retries += 1
+                    await asyncio.sleep(exc.seconds)
+                    continue
+                except Exception as exc:
+                    self.failed += 1
+                    print(tr("Delivery failed:"), exc)
+                    if keys and self.on_failed is not None:
+                        self.on_failed(keys)
+                else:
+                    self.sent += 1
+                    if keys and self.on_sent is not None:
+                        self.on_sent(keys)
+                if self.rate_per_minute > 0:
+                    self._sent_at.append(time.monotonic())
+                break
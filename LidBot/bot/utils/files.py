@@ -0,0 +1,25 @@
+import os
+from pathlib import Path
+from typing import Union
+
+
+def write_atomic(path: Path, data: Union[str, bytes]) -> None:
+    """Replace `path` with `data`: after a crash the file holds either the old or the new content in full."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as fh:
+        fh.write(data.encode("utf-8") if isinstance(data, str) else data)
+        fh.flush()
+        os.fsync(fh.fileno())
+    os.replace(tmp, path)
+    # The rename is only durable once the directory is synced too; Windows cannot open a directory
+    try:
+        fd = os.open(path.parent, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
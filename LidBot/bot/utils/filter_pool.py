@@ -0,0 +1,82 @@
+import asyncio
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
+
+from .i18n import tr
+
+
+def _init_worker(lemma_cache_size: int, lemma_cache_file: Optional[Path], adaptive: bool) -> None:
+    # Importing filters compiles the rules and maps the lemma snapshot; MorphAnalyzer waits for a snapshot miss.
+    from . import filters
+    from .filters import configure_filter_stages, configure_lemma_cache
+
+    # A forked worker inherits the parent's cache: leave its SQLite handle alone and open its own
+    filters.LEMMA_CACHE.detach()
+    configure_lemma_cache(lemma_cache_size, lemma_cache_file)
+    configure_filter_stages(adaptive)
+
+
+# Version of the rules this worker has loaded, see FilterPool.reload_rules
+_rules_version = 0
+
+
+def _filter_batch(texts: List[str], proximity_window: int, rules_version: int) -> Tuple[List[bool], float]:
+    global _rules_version
+    from . import filters
+
+    if rules_version != _rules_version:
+        _rules_version = rules_version
+        try:
+            filters.load_rules()
+        except Exception as exc:
+            print(tr("Rules reload failed in a filter worker, keeping the previous ones:"), exc)
+    started = time.perf_counter()
+    verdicts = filters.passes_filters_batch(texts, proximity_window)
+    seconds = time.perf_counter() - started
+    filters.LEMMA_CACHE.flush()
+    return verdicts, seconds
+
+
+class FilterPool:
+    """
+    Runs passes_filters_batch in worker processes so that lemmatizing long messages
+    never holds the event loop. Texts are sent in batches: one IPC round-trip
+    per batch instead of per message. Workers share the on-disk lemma cache
+    when `lemma_cache_file` is given. Each batch carries the rules version,
+    so after reload_rules() every worker recompiles the rules file before
+    its next batch.
+    """
+
+    def __init__(
+        self,
+        processes: int,
+        lemma_cache_size: int = 20000,
+        lemma_cache_file: Optional[Path] = None,
+        adaptive: bool = False,
+    ):
+        self.processes = processes
+        self._executor = ProcessPoolExecutor(
+            max_workers=processes,
+            initializer=_init_worker,
+            initargs=(lemma_cache_size, lemma_cache_file, adaptive),
+        )
+        self.rules_version = 0
+
+    async def passes_filters(self, texts: Sequence[str], proximity_window: int) -> List[bool]:
+        verdicts, _ = await self.passes_filters_timed(texts, proximity_window)
+        return verdicts
+
+    async def passes_filters_timed(self, texts: Sequence[str], proximity_window: int) -> Tuple[List[bool], float]:
+        """passes_filters() and the seconds the worker spent filtering the batch."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, _filter_batch, list(texts), proximity_window, self.rules_version
+        )
+
+    def reload_rules(self) -> None:
+        self.rules_version += 1
+
+    def shutdown(self, wait: bool = False) -> None:
+        self._executor.shutdown(wait=wait, cancel_futures=True)
@@ -0,0 +1,192 @@
+import os
+import re
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence
+
+from .lemma_cache import LemmaCache
+from .lemma_snapshot import DEFAULT_PATH as DEFAULT_SNAPSHOT_PATH, LemmaSnapshot
+from .rules import DEFAULT_PATH as DEFAULT_RULES_PATH, RulePlan, read_rules
+
+# MorphAnalyzer is only loaded on a snapshot miss; LEMMA_SNAPSHOT_ONLY=1 lowercases unknown words instead
+LEMMA_SNAPSHOT = LemmaSnapshot.open(Path(os.getenv("LEMMA_SNAPSHOT_FILE", str(DEFAULT_SNAPSHOT_PATH))))
+SNAPSHOT_ONLY = LEMMA_SNAPSHOT is not None and os.getenv("LEMMA_SNAPSHOT_ONLY", "").strip().lower() in {
+    "1", "true", "yes", "on",
+}
+
+_morph = None
+
+TOKEN_RE = re.compile(r"[A-Za-zА-Яа-яёЁ0-9]+")
+PHONE_RE = re.compile(r"(?:\+?\d[\d\-\s\(\)]{6,}\d)")
+URL_RE = re.compile(r"https?://\S+")
+CYRILLIC_RE = re.compile("[а-яА-ЯёЁ]")
+
+# Keywords, lemma categories and reject rules (see rules.py); load_rules() swaps the compiled plan in
+RULES_FILE = Path(os.getenv("RULES_FILE", str(DEFAULT_RULES_PATH)))
+# Two regex scans over the whole text, in the cost units of the rules report
+CONTACT_COST = 20.0
+# Only the first MAX_SCAN_CHARS characters are checked (0: all); Telegram messages stay under the default
+MAX_SCAN_CHARS = int(os.getenv("MAX_SCAN_CHARS", 8192))
+
+LEMMA_CACHE = LemmaCache()
+ADAPTIVE = False
+PLAN: Optional[RulePlan] = None
+
+
+def get_morph():
+    """The pymorphy3 analyzer, built on first use."""
+    global _morph
+    if _morph is None:
+        import pymorphy3
+
+        _morph = pymorphy3.MorphAnalyzer()
+    return _morph
+
+
+def configure_lemma_cache(maxsize: int = 20000, path: Optional[Path] = None) -> LemmaCache:
+    """Replace the default in-memory cache, e.g. with one backed by a shared file."""
+    global LEMMA_CACHE
+    LEMMA_CACHE.close()
+    LEMMA_CACHE = LemmaCache(maxsize=maxsize, path=path)
+    LEMMA_CACHE.warm()
+    return LEMMA_CACHE
+
+
+def safe_lemma(word: str) -> str:
+    cleaned = (word or "").strip()
+    if not cleaned:
+        return cleaned
+    if not CYRILLIC_RE.search(cleaned):
+        return cleaned.lower()
+    lemma = LEMMA_CACHE.get(cleaned)
+    if lemma is not None:
+        return lemma
+    if LEMMA_SNAPSHOT is not None:
+        lemma = LEMMA_SNAPSHOT.get(cleaned)
+        if lemma is not None:
+            LEMMA_CACHE.put(cleaned, lemma, persist=False)
+            return lemma
+        if SNAPSHOT_ONLY:
+            return cleaned.lower()
+    try:
+        lemma = get_morph().parse(cleaned)[0].normal_form
+    except Exception:
+        return cleaned.lower()
+    LEMMA_CACHE.put(cleaned, lemma)
+    return lemma
+
+
+def extract_username(line: str) -> Optional[str]:
+    if not line:
+        return None
+    value = line.strip()
+    if not value:
+        return None
+    match = re.search(r"(?:https?://)?t\.me/([^/\s]+)", value)
+    if match:
+        value = match.group(1)
+    value = value.strip().lstrip("@")
+    if not value or "joinchat" in value.lower():
+        return None
+    return value
+
+
+def tokenize(text_lower: str) -> List[str]:
+    return TOKEN_RE.findall(text_lower)
+
+
+def iter_tokens(text_lower: str) -> Iterator[str]:
+    """The tokens of tokenize(), found one at a time as they are consumed."""
+    return map(re.Match.group, TOKEN_RE.finditer(text_lower))
+
+
+def has_proximity(lemmas: List[str], left_set: set, right_set: set, window: int) -> bool:
+    """A `left_set` lemma within `window` tokens of a `right_set` one, in either order."""
+    last_left = last_right = -window - 1
+    for i, token in enumerate(lemmas):
+        if token in left_set:
+            if token in right_set or i - last_right <= window:
+                return True
+            last_left = i
+        if token in right_set:
+            if i - last_left <= window:
+                return True
+            last_right = i
+    return False
+
+
+def has_contact_info(text: str) -> bool:
+    return bool(PHONE_RE.search(text) or URL_RE.search(text))
+
+
+class _Message:
+    __slots__ = ("text", "lower", "hits", "lemmatize", "categories", "matched", "window")
+
+    def __init__(self, text: str, proximity_window: int, plan: RulePlan):
+        if MAX_SCAN_CHARS > 0:
+            text = text[:MAX_SCAN_CHARS]
+        self.text = text
+        self.lower = text.lower()
+        self.hits = plan.matcher.scan(self.lower)
+        # Set by a batch to share its lemmas; otherwise the plan's lemmatizer is used
+        self.lemmatize: Optional[Callable[[str], str]] = None
+        # Category and proximity-rule bits, filled by the rules' lemmatize stage
+        self.categories = 0
+        self.matched = 0
+        self.window = proximity_window
+
+
+class _BatchLemmas(dict):
+    """Token -> lemma for one batch; a token is lemmatized the first time it is asked for."""
+
+    def __missing__(self, token: str) -> str:
+        lemma = self[token] = safe_lemma(token)
+        return lemma
+
+
+def load_rules(path: Optional[Path] = None) -> RulePlan:
+    """Compile the rules file and swap it in; if it is invalid this raises and the current plan stays."""
+    global PLAN
+    path = path or RULES_FILE
+    checks = {"contact": (has_contact_info, CONTACT_COST)}
+    # Looked up on every call, so the plan follows a replaced safe_lemma
+    plan = RulePlan(read_rules(path), lambda word: safe_lemma(word), iter_tokens, checks, path)
+    plan.filter_stages.adaptive = ADAPTIVE
+    PLAN = plan
+    return plan
+
+
+def current_rules() -> RulePlan:
+    return PLAN
+
+
+def configure_filter_stages(adaptive: bool) -> None:
+    global ADAPTIVE
+    ADAPTIVE = adaptive
+    PLAN.filter_stages.adaptive = adaptive
+
+
+def filter_stats() -> List[Dict[str, Any]]:
+    return PLAN.stats()
+
+
+def passes_filters(text: str, proximity_window: int) -> bool:
+    if not text:
+        return False
+    plan = PLAN
+    return not plan.rejects(_Message(text, proximity_window, plan))
+
+
+def passes_filters_batch(texts: Sequence[str], proximity_window: int) -> List[bool]:
+    """passes_filters for each text, lemmatizing every distinct token of the batch once."""
+    plan = PLAN
+    lemma_of = _BatchLemmas()
+    messages: List[Optional[_Message]] = []
+    for text in texts:
+        message = _Message(text, proximity_window, plan) if text else None
+        if message is not None:
+            message.lemmatize = lemma_of.__getitem__
+        messages.append(None if message is None or plan.filter_stages.rejects(message) else message)
+    return [message is not None and not plan.lemma_stages.rejects(message) for message in messages]
+
+
+load_rules()
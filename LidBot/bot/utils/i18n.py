@@ -0,0 +1,14 @@
+from typing import Dict, Mapping
+
+# English log line -> the same line in the language of the first profile; lines missing here stay English
+_MESSAGES: Dict[str, str] = {}
+
+
+def set_messages(messages: Mapping[str, str]) -> None:
+    _MESSAGES.clear()
+    _MESSAGES.update(messages)
+
+
+def tr(message: str, **fields) -> str:
+    """A log line in the configured language: `message` is the English template and the catalog key."""
+    return _MESSAGES.get(message, message).format(**fields)
@@ -0,0 +1,149 @@
+import sqlite3
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional
+
+
+class LemmaCache:
+    """
+    Two-tier word -> lemma cache: an in-memory LRU in front of an optional
+    SQLite file. The file runs in WAL mode with a memory-mapped read path, so
+    several bot processes can share it and it survives restarts. New lemmas
+    are written back in batches of `flush_every`; a batch that finds the file
+    locked by another process waits at most `busy_timeout` seconds and is
+    kept for the next flush.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 20000,
+        path: Optional[Path] = None,
+        flush_every: int = 256,
+        busy_timeout: float = 0.05,
+    ):
+        self.maxsize = max(1, maxsize)
+        self.path = path
+        self.flush_every = max(1, flush_every)
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.warm_entries = 0
+        self.warm_seconds = 0.0
+        self.deferred_flushes = 0
+        self._memory: "OrderedDict[str, str]" = OrderedDict()
+        self._pending: Dict[str, str] = {}
+        self._db: Optional[sqlite3.Connection] = None
+        if path is not None:
+            self._db = _open_db(path, busy_timeout)
+
+    def get(self, word: str) -> Optional[str]:
+        lemma = self._memory.get(word)
+        if lemma is not None:
+            self._memory.move_to_end(word)
+            self.hits += 1
+            return lemma
+        if self._db is not None:
+            try:
+                row = self._db.execute("SELECT lemma FROM lemmas WHERE word = ?", (word,)).fetchone()
+            except sqlite3.Error:
+                row = None
+            if row is not None:
+                self.disk_hits += 1
+                self._remember(word, row[0])
+                return row[0]
+        self.misses += 1
+        return None
+
+    def put(self, word: str, lemma: str, persist: bool = True) -> None:
+        self._remember(word, lemma)
+        if persist and self._db is not None:
+            self._pending[word] = lemma
+            if len(self._pending) >= self.flush_every:
+                self.flush()
+
+    def warm(self) -> int:
+        """Preload up to `maxsize` entries from disk; returns how many were loaded."""
+        if self._db is None:
+            return 0
+        start = time.perf_counter()
+        try:
+            rows = self._db.execute("SELECT word, lemma FROM lemmas LIMIT ?", (self.maxsize,)).fetchall()
+        except sqlite3.Error:
+            rows = []
+        for word, lemma in rows:
+            self._memory[word] = lemma
+        self.warm_entries = len(rows)
+        self.warm_seconds = time.perf_counter() - start
+        return self.warm_entries
+
+    def flush(self) -> None:
+        if self._db is None or not self._pending:
+            return
+        try:
+            with self._db:
+                self._db.executemany("INSERT OR IGNORE INTO lemmas (word, lemma) VALUES (?, ?)", self._pending.items())
+        except sqlite3.OperationalError:
+            # Locked by another writer: retry with the next batch rather than wait on the caller's thread.
+            # Past `maxsize` rows the backlog is dropped, the lemmas stay in memory all the same.
+            self.deferred_flushes += 1
+            if len(self._pending) > self.maxsize:
+                self._pending.clear()
+            return
+        except sqlite3.Error:
+            pass
+        self._pending.clear()
+
+    def detach(self) -> None:
+        """
+        Forget the SQLite connection without flushing or closing it. For a
+        cache inherited through fork(): the handle belongs to the parent, and
+        closing it in the child could checkpoint or remove the parent's WAL.
+        """
+        if self._db is not None:
+            _DETACHED.append(self._db)
+        self._db = None
+        self._pending.clear()
+
+    def close(self) -> None:
+        self.flush()
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            "size": len(self._memory),
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+            "warm_entries": self.warm_entries,
+            "warm_seconds": self.warm_seconds,
+            "deferred_flushes": self.deferred_flushes,
+        }
+
+    def _remember(self, word: str, lemma: str) -> None:
+        self._memory[word] = lemma
+        self._memory.move_to_end(word)
+        if len(self._memory) > self.maxsize:
+            self._memory.popitem(last=False)
+            self.evictions += 1
+
+
+# Connections dropped by detach(), referenced until exit so that they are never closed
+_DETACHED: List[sqlite3.Connection] = []
+
+
+def _open_db(path: Path, busy_timeout: float) -> sqlite3.Connection:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    db = sqlite3.connect(str(path), timeout=busy_timeout)
+    db.execute("PRAGMA journal_mode=WAL")
+    db.execute("PRAGMA synchronous=NORMAL")
+    db.execute("PRAGMA mmap_size=67108864")
+    db.execute("CREATE TABLE IF NOT EXISTS lemmas (word TEXT PRIMARY KEY, lemma TEXT NOT NULL) WITHOUT ROWID")
+    db.commit()
+    return db
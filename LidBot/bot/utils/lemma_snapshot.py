@@ -0,0 +1,142 @@
+"""
+Precomputed word -> lemma table for fast startup.
+
+File layout (little-endian): a 12-byte header (magic, version, entry count),
+`count + 1` uint32 offsets, then the entries sorted by UTF-8 word, each stored
+as `word \\0 lemma`. Lookups binary-search the mmap'd file, so only the pages
+actually touched are read.
+
+Build one from the keyword sets, their inflected forms and the vocabulary the
+bot has seen (text files and/or the lemma cache):
+
+    python -m bot.utils.lemma_snapshot --vocab chats.txt --lemma-cache bot/data/lemma_cache.sqlite3
+"""
+
+import argparse
+import mmap
+import sqlite3
+import struct
+from pathlib import Path
+from typing import Dict, Iterable, Mapping, Optional
+
+from .files import write_atomic
+
+MAGIC = b"LBLS"
+VERSION = 1
+_HEADER = struct.Struct("<4sHHI")
+_OFFSET = struct.Struct("<I")
+_SPAN = struct.Struct("<II")
+
+DEFAULT_PATH = Path(__file__).resolve().parents[1] / "data" / "lemmas.snap"
+
+
+class LemmaSnapshot:
+    def __init__(self, path: Path):
+        self.path = path
+        with open(path, "rb") as fh:
+            self._mm = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, _, count = _HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != VERSION:
+            self._mm.close()
+            raise ValueError(f"{path} is not a lemma snapshot")
+        self.count = count
+        self._data_start = _HEADER.size + _OFFSET.size * (count + 1)
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def open(cls, path: Path) -> Optional["LemmaSnapshot"]:
+        """Open `path` if it holds a valid snapshot, otherwise return None."""
+        try:
+            return cls(path)
+        except (OSError, ValueError, struct.error):
+            return None
+
+    def __len__(self) -> int:
+        return self.count
+
+    def get(self, word: str) -> Optional[str]:
+        key = word.encode("utf-8")
+        mm = self._mm
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            start, end = _SPAN.unpack_from(mm, _HEADER.size + _OFFSET.size * mid)
+            entry = mm[self._data_start + start:self._data_start + end]
+            sep = entry.index(b"\0")
+            probe = entry[:sep]
+            if probe < key:
+                lo = mid + 1
+            elif probe > key:
+                hi = mid
+            else:
+                self.hits += 1
+                return entry[sep + 1:].decode("utf-8")
+        self.misses += 1
+        return None
+
+    def close(self) -> None:
+        self._mm.close()
+
+
+def write_snapshot(lemmas: Mapping[str, str], path: Path) -> int:
+    """Write `lemmas` as a snapshot (atomically replacing `path`); returns the entry count."""
+    entries = sorted((word.encode("utf-8"), lemma.encode("utf-8")) for word, lemma in lemmas.items())
+    offsets = [0]
+    blob = bytearray()
+    for word, lemma in entries:
+        blob += word + b"\0" + lemma
+        offsets.append(len(blob))
+
+    header = _HEADER.pack(MAGIC, VERSION, 0, len(entries)) + struct.pack(f"<{len(offsets)}I", *offsets)
+    write_atomic(path, header + blob)
+    return len(entries)
+
+
+def build_lemmas(words: Iterable[str], morph) -> Dict[str, str]:
+    from .filters import CYRILLIC_RE
+
+    lemmas: Dict[str, str] = {}
+    for word in words:
+        word = word.strip()
+        if word and word not in lemmas and CYRILLIC_RE.search(word):
+            lemmas[word] = morph.parse(word)[0].normal_form
+    return lemmas
+
+
+def keyword_forms(morph) -> Iterable[str]:
+    """Every word of the rules' lemma categories plus all inflected forms of each."""
+    from . import filters
+
+    for raw in filters.current_rules().words.values():
+        for word in raw:
+            yield word
+            if filters.CYRILLIC_RE.search(word):
+                for form in morph.parse(word)[0].lexeme:
+                    yield form.word
+                    yield form.word.replace("ё", "е")
+
+
+def main() -> None:
+    from . import filters
+
+    parser = argparse.ArgumentParser(description="Build a precomputed lemma snapshot.")
+    parser.add_argument("-o", "--output", type=Path, default=DEFAULT_PATH)
+    parser.add_argument("--vocab", type=Path, action="append", default=[], help="text file(s) to tokenize")
+    parser.add_argument("--lemma-cache", type=Path, help="SQLite lemma cache to take observed words from")
+    args = parser.parse_args()
+
+    morph = filters.get_morph()
+    words = list(keyword_forms(morph))
+    for path in args.vocab:
+        words.extend(filters.tokenize(path.read_text(encoding="utf-8").lower()))
+    if args.lemma_cache is not None and args.lemma_cache.is_file():
+        with sqlite3.connect(str(args.lemma_cache)) as db:
+            words.extend(word for (word,) in db.execute("SELECT word FROM lemmas"))
+
+    count = write_snapshot(build_lemmas(words, morph), args.output)
+    print(f"Wrote {count} lemmas to {args.output} ({args.output.stat().st_size / 1024:.0f} KB)")
+
+
+if __name__ == "__main__":
+    main()
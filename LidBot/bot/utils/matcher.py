@@ -0,0 +1,65 @@
+from collections import deque
+from typing import Dict, Iterable, List, Mapping, Set, Tuple
+
+
+class KeywordMatcher:
+    """
+    Aho–Corasick automaton over several keyword categories.
+    `scan()` walks the text once and returns {category: matched keywords}
+    for every category that has at least one hit.
+    """
+
+    def __init__(self, categories: Mapping[str, Iterable[str]]):
+        self.categories: Tuple[str, ...] = tuple(categories)
+        self.keyword_count = 0
+
+        goto: List[Dict[str, int]] = [{}]
+        out: List[Tuple[Tuple[str, str], ...]] = [()]
+        for category, words in categories.items():
+            for word in words:
+                if not word:
+                    continue
+                node = 0
+                for ch in word:
+                    nxt = goto[node].get(ch)
+                    if nxt is None:
+                        nxt = len(goto)
+                        goto[node][ch] = nxt
+                        goto.append({})
+                        out.append(())
+                    node = nxt
+                if (category, word) not in out[node]:
+                    out[node] += ((category, word),)
+                    self.keyword_count += 1
+
+        # Breadth-first: failure links, merged outputs and a full transition
+        # table per state, so scanning never has to follow failure links.
+        fail = [0] * len(goto)
+        delta: List[Dict[str, int]] = [dict(goto[0])] + [{} for _ in goto[1:]]
+        queue = deque(goto[0].values())
+        while queue:
+            node = queue.popleft()
+            delta[node] = {**delta[fail[node]], **goto[node]}
+            for ch, nxt in goto[node].items():
+                fail[nxt] = delta[fail[node]].get(ch, 0)
+                out[nxt] += out[fail[nxt]]
+                queue.append(nxt)
+
+        self._delta = delta
+        self._out = out
+
+    def scan(self, text: str) -> Dict[str, Set[str]]:
+        delta = self._delta
+        out = self._out
+        hits: Dict[str, Set[str]] = {}
+        node = 0
+        for ch in text:
+            node = delta[node].get(ch, 0)
+            if out[node]:
+                for category, word in out[node]:
+                    found = hits.get(category)
+                    if found is None:
+                        hits[category] = {word}
+                    else:
+                        found.add(word)
+        return hits
@@ -0,0 +1,84 @@
+import time
+from typing import Optional
+
+import aiohttp
+
+from .i18n import tr
+from .metrics import Counter, Histogram
+
+BOT_API_URL = "https://api.telegram.org"
+
+# One keep-alive connection pool for every Bot API call, created lazily inside
+# the running event loop and reused until close_notifier().
+_session: Optional[aiohttp.ClientSession] = None
+
+NOTIFY_SECONDS = Histogram("lidbot_notify_seconds", "Time to deliver a notification", ["method"])
+NOTIFY_ERRORS = Counter("lidbot_notify_errors_total", "Failed notification attempts", ["method"])
+
+
+class RetryAfter(Exception):
+    """The Bot API answered 429; the same message may be sent again after `seconds`."""
+
+    def __init__(self, seconds: float):
+        super().__init__(f"retry after {seconds} s")
+        self.seconds = seconds
+
+
+def _get_session() -> aiohttp.ClientSession:
+    global _session
+    if _session is None or _session.closed:
+        _session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=20, keepalive_timeout=60, ttl_dns_cache=300),
+            timeout=aiohttp.ClientTimeout(total=10),
+        )
+    return _session
+
+
+async def close_notifier() -> None:
+    global _session
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = None
+
+
+async def notify(
+    client,
+    message: str,
+    bot_token: str,
+    dest_chat_id: int,
+    api_url: str = BOT_API_URL,
+) -> None:
+    if bot_token and dest_chat_id:
+        started = time.perf_counter()
+        retry_after = None
+        try:
+            async with _get_session().post(
+                f"{api_url}/bot{bot_token}/sendMessage",
+                json={
+                    "chat_id": dest_chat_id,
+                    "text": message,
+                    "parse_mode": "HTML",
+                    "disable_web_page_preview": True,
+                },
+            ) as resp:
+                if resp.ok:
+                    NOTIFY_SECONDS.observe(time.perf_counter() - started, "bot_api")
+                    return
+                if resp.status == 429:
+                    payload = await resp.json(content_type=None)
+                    retry_after = float(payload.get("parameters", {}).get("retry_after", 1))
+                else:
+                    print(tr("Bot API send error:"), resp.status, await resp.text())
+        except Exception as exc:
+            print(tr("Bot API send exception:"), exc)
+        NOTIFY_ERRORS.inc("bot_api")
+        if retry_after is not None:
+            # Rate limited, not broken: let the caller wait instead of diverting to the fallback
+            raise RetryAfter(retry_after)
+
+    try:
+        with NOTIFY_SECONDS.time("fallback"):
+            await client.send_message("me", message, parse_mode="html")
+    except Exception:
+        NOTIFY_ERRORS.inc("fallback")
+        raise
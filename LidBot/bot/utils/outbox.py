@@ -0,0 +1,227 @@
+import asyncio
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Set, Tuple
+
+from .i18n import tr
+
+# Retry delays stop doubling after this many attempts
+MAX_BACKOFF_STEPS = 20
+
+
+class Outbox:
+    """
+    Write-ahead log for notifications. Every lead is committed to a SQLite
+    file (WAL, synchronous=FULL) before it is handed to the sender and is
+    marked delivered afterwards, so a crash, a restart or an outage of both
+    the Bot API and the fallback only delays it.
+
+    All writes go through one background thread. Whatever is queued while a
+    transaction is being synced goes into the next one, so a burst costs one
+    fsync per group instead of one per lead (`group_commit=False` commits
+    every request on its own, for comparison). Sends that failed come back
+    from run() after `retry_delay` seconds, doubling per attempt up to
+    `max_retry_delay`; delivered rows are purged after `keep_delivered`.
+    Each row carries a `channel` naming the sender it belongs to.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        retry_delay: float = 5.0,
+        max_retry_delay: float = 600.0,
+        keep_delivered: float = 24 * 3600,
+        group_commit: bool = True,
+    ):
+        self.path = path
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self.keep_delivered = keep_delivered
+        self.group_commit = group_commit
+        self.added = 0
+        self.delivered = 0
+        self.retried = 0
+        self.recovered = 0
+        self.commits = 0
+        self.undelivered = 0
+        self._opened_at = 0.0
+        self._db: Optional[sqlite3.Connection] = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="outbox")
+        self._ops: List[Tuple[str, Sequence, Optional[asyncio.Future]]] = []
+        self._in_flight: Set[int] = set()
+        self._wakeup = asyncio.Event()
+        self._closing = False
+        self._writer: Optional[asyncio.Task] = None
+
+    async def open(self) -> int:
+        """Open the file and start the writer; returns how many leads are still waiting from earlier runs."""
+        self._opened_at = time.time()
+        self.undelivered = await self._call(self._open_db)
+        self._writer = asyncio.create_task(self._write_loop())
+        return self.undelivered
+
+    async def add(self, texts: Sequence[str], channel: str = "") -> List[int]:
+        """Persist `texts`; returns their keys once the transaction holding them is on disk."""
+        future = asyncio.get_running_loop().create_future()
+        self._submit("add", [(channel, text) for text in texts], future)
+        return await future
+
+    def mark_delivered(self, keys: Sequence[int]) -> None:
+        self._submit("delivered", list(keys), None)
+
+    def mark_failed(self, keys: Sequence[int]) -> None:
+        """Schedule another attempt with exponential backoff."""
+        self._submit("failed", list(keys), None)
+
+    async def run(self, put: Callable[[str, int, str], None], interval: float = 5.0) -> None:
+        """
+        Hand leads left over from earlier runs to `put(text, key, channel)`,
+        then keep re-sending failed ones as their retry time comes. Leads
+        added in this run are sent by the caller and only come back here
+        after a failure.
+        """
+        while True:
+            rows = await self._call(self._due, time.time())
+            for key, text, attempts, channel in rows:
+                if key in self._in_flight:
+                    continue
+                self._in_flight.add(key)
+                if attempts:
+                    self.retried += 1
+                else:
+                    self.recovered += 1
+                put(text, key, channel)
+            await asyncio.sleep(interval)
+
+    async def close(self) -> None:
+        """Commit whatever is still queued and close the file."""
+        self._closing = True
+        self._wakeup.set()
+        if self._writer is not None:
+            await asyncio.gather(self._writer, return_exceptions=True)
+            self._writer = None
+        await self._call(self._close_db)
+        self._executor.shutdown(wait=True)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "added": self.added,
+            "delivered": self.delivered,
+            "undelivered": self.undelivered,
+            "retried": self.retried,
+            "recovered": self.recovered,
+            "commits": self.commits,
+        }
+
+    def _submit(self, kind: str, payload: Sequence, future: Optional[asyncio.Future]) -> None:
+        if payload:
+            self._ops.append((kind, payload, future))
+            self._wakeup.set()
+        elif future is not None:
+            future.set_result([])
+
+    async def _write_loop(self) -> None:
+        while True:
+            if not self._ops:
+                if self._closing:
+                    return
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            if self.group_commit:
+                ops, self._ops = self._ops, []
+            else:
+                ops = [self._ops.pop(0)]
+            try:
+                results = await self._call(self._apply, ops, time.time())
+            except Exception as exc:
+                print(tr("Outbox write failed:"), exc)
+                for _, payload, future in ops:
+                    if future is None:
+                        # The row stays undelivered, so run() will send it (again)
+                        self._in_flight.difference_update(payload)
+                    elif not future.done():
+                        future.set_exception(exc)
+                continue
+            self.commits += 1
+            for (kind, payload, future), result in zip(ops, results):
+                if kind == "add":
+                    self.added += len(payload)
+                    self.undelivered += len(payload)
+                    self._in_flight.update(result)
+                else:
+                    # Only now can run() see these rows again
+                    self._in_flight.difference_update(payload)
+                    if kind == "delivered":
+                        self.delivered += result
+                        self.undelivered -= result
+                if future is not None and not future.done():
+                    future.set_result(result)
+
+    async def _call(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    # The methods below run on the outbox thread only.
+
+    def _open_db(self) -> int:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        db = sqlite3.connect(str(self.path), timeout=5.0)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=FULL")
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS outbox ("
+            "id INTEGER PRIMARY KEY, text TEXT NOT NULL, created_at REAL NOT NULL, "
+            "attempts INTEGER NOT NULL DEFAULT 0, next_attempt_at REAL NOT NULL, delivered_at REAL, "
+            "channel TEXT NOT NULL DEFAULT '')"
+        )
+        if "channel" not in {row[1] for row in db.execute("PRAGMA table_info(outbox)")}:
+            db.execute("ALTER TABLE outbox ADD COLUMN channel TEXT NOT NULL DEFAULT ''")
+        db.execute("CREATE INDEX IF NOT EXISTS outbox_pending ON outbox (next_attempt_at) WHERE delivered_at IS NULL")
+        with db:
+            db.execute("DELETE FROM outbox WHERE delivered_at < ?", (time.time() - self.keep_delivered,))
+        self._db = db
+        return db.execute("SELECT COUNT(*) FROM outbox WHERE delivered_at IS NULL").fetchone()[0]
+
+    def _apply(self, ops, now: float) -> List:
+        results: List = []
+        with self._db:
+            for kind, payload, _ in ops:
+                if kind == "add":
+                    results.append(
+                        [
+                            self._db.execute(
+                                "INSERT INTO outbox (text, channel, created_at, next_attempt_at) VALUES (?, ?, ?, ?)",
+                                (text, channel, now, now),
+                            ).lastrowid
+                            for channel, text in payload
+                        ]
+                    )
+                elif kind == "delivered":
+                    cursor = self._db.executemany(
+                        "UPDATE outbox SET delivered_at = ? WHERE id = ? AND delivered_at IS NULL",
+                        [(now, key) for key in payload],
+                    )
+                    results.append(cursor.rowcount)
+                else:
+                    self._db.executemany(
+                        "UPDATE outbox SET attempts = attempts + 1, "
+                        "next_attempt_at = ? + MIN(?, ? * (1 << MIN(attempts, ?))) WHERE id = ?",
+                        [(now, self.max_retry_delay, self.retry_delay, MAX_BACKOFF_STEPS, key) for key in payload],
+                    )
+                    results.append(None)
+        return results
+
+    def _due(self, now: float, limit: int = 500) -> List[Tuple[int, str, int, str]]:
+        # Rows added in this run are in flight from the start; only retries and leftovers are due here
+        return self._db.execute(
+            "SELECT id, text, attempts, channel FROM outbox WHERE delivered_at IS NULL AND next_attempt_at <= ? "
+            "AND (attempts > 0 OR created_at < ?) ORDER BY id LIMIT ?",
+            (now, self._opened_at, limit),
+        ).fetchall()
+
+    def _close_db(self) -> None:
+        if self._db is not None:
+            self._db.close()
+            self._db = None
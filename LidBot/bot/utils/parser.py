@@ -0,0 +1,152 @@
+import html
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from telethon.utils import get_peer_id
+
+from .i18n import tr
+
+# {title} and {text} arrive HTML-escaped; profiles bring their own templates
+LEAD_TEMPLATE = "🔎 <b>Lead detected</b> in <b>{title}</b>:\n\n{text}\n\n👉 <a href=\"{link}\">Open message</a>"
+LEAD_TEMPLATE_NO_LINK = "🔎 <b>Lead detected</b> in <b>{title}</b>:\n\n{text}"
+
+
+@dataclass
+class Lead:
+    """A message travelling through the lead pipeline."""
+
+    event: Any
+    text: str
+    title: str = ""
+    link: Optional[str] = None
+    # Profiles the lead goes to: those of its chat, less the ones it is a near-duplicate for
+    profiles: List[Any] = field(default_factory=list)
+    # Profile name -> notification text, for every profile in `profiles`
+    notifications: Dict[str, str] = field(default_factory=dict)
+
+
+@dataclass
+class ChatMeta:
+    """The parts of a chat entity needed for a notification."""
+
+    title: str
+    username: Optional[str] = None
+    id: Optional[int] = None
+
+    @classmethod
+    def from_entity(cls, chat) -> "ChatMeta":
+        title = getattr(chat, "title", getattr(chat, "first_name", "chat"))
+        return cls(str(title), getattr(chat, "username", None), getattr(chat, "id", None))
+
+
+class ChatMetaCache:
+    """Chat id -> ChatMeta with a TTL per entry and LRU eviction beyond `maxsize`."""
+
+    def __init__(self, ttl: float = 3600.0, maxsize: int = 10000):
+        self.ttl = ttl
+        self.maxsize = max(1, maxsize)
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[int, Tuple[float, ChatMeta]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, chat_id: int) -> Optional[ChatMeta]:
+        entry = self._entries.get(chat_id)
+        if entry is None or entry[0] < time.monotonic():
+            self.misses += 1
+            return None
+        self._entries.move_to_end(chat_id)
+        self.hits += 1
+        return entry[1]
+
+    def peek(self, chat_id: int) -> Optional[ChatMeta]:
+        """The entry even if expired, without counting a hit or a miss."""
+        entry = self._entries.get(chat_id)
+        return entry[1] if entry is not None else None
+
+    def put(self, chat_id: int, meta: ChatMeta) -> None:
+        self._entries[chat_id] = (time.monotonic() + self.ttl, meta)
+        self._entries.move_to_end(chat_id)
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, chat_id: int) -> None:
+        self._entries.pop(chat_id, None)
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+def extract_text(event) -> str:
+    if getattr(event, "raw_text", None):
+        return event.raw_text
+    if getattr(event, "message", None) and getattr(event.message, "message", None):
+        return event.message.message
+    return ""
+
+
+async def resolve_chat_meta(event, cache: Optional[ChatMetaCache] = None) -> Tuple[str, Optional[str]]:
+    meta = cache.get(event.chat_id) if cache is not None else None
+    if meta is None:
+        meta = ChatMeta.from_entity(await event.get_chat())
+        if cache is not None:
+            cache.put(event.chat_id, meta)
+    message_id = getattr(event.message, "id", None) or getattr(event, "id", None)
+
+    if not message_id:
+        link = None
+    elif meta.username:
+        link = f"https://t.me/{meta.username}/{message_id}"
+    else:
+        cid = meta.id
+        if cid is None:
+            link = None
+        else:
+            raw = str(cid)
+            if raw.startswith("-100"):
+                chat_part = raw[4:]
+            else:
+                chat_part = raw.lstrip("-")
+            link = f"https://t.me/c/{chat_part}/{message_id}"
+
+    return meta.title, link
+
+
+async def refresh_chat_meta(client, chats: Sequence, cache: ChatMetaCache, batch_size: int = 100) -> int:
+    """Fetch the entities for `chats` in batches and store their metadata; returns how many were cached."""
+    cached = 0
+    for start in range(0, len(chats), batch_size):
+        try:
+            entities = await client.get_entity(list(chats[start:start + batch_size]))
+        except Exception as exc:
+            print(tr("Chat metadata refresh failed:"), exc)
+            continue
+        for entity in entities:
+            cache.put(get_peer_id(entity), ChatMeta.from_entity(entity))
+            cached += 1
+    return cached
+
+
+def build_notification(
+    title: str,
+    text: str,
+    link: Optional[str],
+    template: str = LEAD_TEMPLATE,
+    template_no_link: str = LEAD_TEMPLATE_NO_LINK,
+) -> str:
+    excerpt = html.escape(text[:900])
+    escaped_title = html.escape(title)
+    if link:
+        return template.format(title=escaped_title, text=excerpt, link=link)
+    return template_no_link.format(title=escaped_title, text=excerpt)
+
@@ -0,0 +1,168 @@
+import asyncio
+import inspect
+import time
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional
+
+
+class Stage:
+    """
+    One pipeline step. `workers` tasks take items from a bounded queue, run
+    `func` (sync or async) and pass every non-None result to the next stage;
+    returning None drops the item. With `batch_size` > 1 a worker takes up to
+    that many already-queued items at once, and `func` gets the list and
+    returns one result per item; if a batch raises, its items are retried
+    one at a time so only the failing ones are lost.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        func: Callable[[Any], Any],
+        workers: int = 1,
+        queue_size: int = 100,
+        batch_size: int = 1,
+    ):
+        self.name = name
+        self.func = func
+        self.workers = max(1, workers)
+        self.batch_size = max(1, batch_size)
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max(1, queue_size))
+        self.processed = 0
+        self.dropped = 0
+        self.errors = 0
+        self.busy = 0
+        self.wait_count = 0
+        self.wait_seconds = 0.0
+        self.run_count = 0
+        self.run_seconds = 0.0
+        self._wait = deque(maxlen=1000)
+        self._run = deque(maxlen=1000)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "queued": self.queue.qsize(),
+            "capacity": self.queue.maxsize,
+            "workers": self.workers,
+            "batch_size": self.batch_size,
+            "busy": self.busy,
+            "processed": self.processed,
+            "dropped": self.dropped,
+            "errors": self.errors,
+            "wait_p50": _percentile(self._wait, 0.50),
+            "wait_p95": _percentile(self._wait, 0.95),
+            "run_p50": _percentile(self._run, 0.50),
+            "run_p95": _percentile(self._run, 0.95),
+            "wait_count": self.wait_count,
+            "wait_sum": self.wait_seconds,
+            "run_count": self.run_count,
+            "run_sum": self.run_seconds,
+        }
+
+
+class Pipeline:
+    """
+    Chain of stages connected by bounded queues. `submit()` blocks while the
+    first queue is full, and a full downstream queue stalls the workers of
+    the stage before it, so bursts are absorbed by the queues instead of
+    piling up as unbounded tasks.
+    """
+
+    def __init__(self, stages: List[Stage], on_error: Optional[Callable[[str, Exception], None]] = None):
+        if not stages:
+            raise ValueError("Pipeline needs at least one stage")
+        self.stages = stages
+        self.on_error = on_error
+        self._tasks: List[asyncio.Task] = []
+
+    def start(self) -> None:
+        for index, stage in enumerate(self.stages):
+            for _ in range(stage.workers):
+                self._tasks.append(asyncio.create_task(self._worker(index)))
+
+    async def submit(self, item: Any) -> None:
+        await self.stages[0].queue.put((time.perf_counter(), item))
+
+    async def join(self) -> None:
+        """Wait until every item submitted so far has left the last stage."""
+        for stage in self.stages:
+            await stage.queue.join()
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+
+    def stats(self) -> List[Dict[str, Any]]:
+        return [stage.stats() for stage in self.stages]
+
+    async def _worker(self, index: int) -> None:
+        stage = self.stages[index]
+        next_stage = self.stages[index + 1] if index + 1 < len(self.stages) else None
+        while True:
+            batch = [await stage.queue.get()]
+            while len(batch) < stage.batch_size and not stage.queue.empty():
+                batch.append(stage.queue.get_nowait())
+            started = time.perf_counter()
+            waits = [started - queued_at for queued_at, _ in batch]
+            stage._wait.extend(waits)
+            stage.wait_count += len(waits)
+            stage.wait_seconds += sum(waits)
+            items = [item for _, item in batch]
+            stage.busy += 1
+            try:
+                results = await self._call(stage, items)
+            except Exception as exc:
+                if len(items) == 1:
+                    results = [self._failed(stage, exc)]
+                else:
+                    results = []
+                    for item in items:
+                        try:
+                            results.extend(await self._call(stage, [item]))
+                        except Exception as item_exc:
+                            results.append(self._failed(stage, item_exc))
+            finally:
+                stage.busy -= 1
+                elapsed = time.perf_counter() - started
+                stage._run.append(elapsed)
+                stage.run_count += 1
+                stage.run_seconds += elapsed
+                stage.processed += len(items)
+
+            try:
+                if next_stage is not None:
+                    for result in results:
+                        if result is None:
+                            stage.dropped += 1
+                        elif result is not _FAILED:
+                            await next_stage.queue.put((time.perf_counter(), result))
+            finally:
+                for _ in batch:
+                    stage.queue.task_done()
+
+    @staticmethod
+    async def _call(stage: Stage, items: List[Any]) -> List[Any]:
+        output = stage.func(items) if stage.batch_size > 1 else stage.func(items[0])
+        if inspect.isawaitable(output):
+            output = await output
+        return list(output) if stage.batch_size > 1 else [output]
+
+    def _failed(self, stage: Stage, exc: Exception) -> object:
+        stage.errors += 1
+        if self.on_error is not None:
+            self.on_error(stage.name, exc)
+        return _FAILED
+
+
+# Result of an item whose stage raised: counted in `errors`, not `dropped`
+_FAILED = object()
+
+
+def _percentile(samples, fraction: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
@@ -0,0 +1,53 @@
+import json
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, FrozenSet, Optional
+
+from .parser import LEAD_TEMPLATE, LEAD_TEMPLATE_NO_LINK, build_notification
+
+PROFILES_DIR = Path(__file__).resolve().parents[1] / "data" / "profiles"
+
+
+@dataclass
+class Profile:
+    """
+    One language profile served by the runtime: how its notifications, digest
+    headers and per-lead log lines read, which env values count as true, and
+    where its chat list and destination are. Texts come from
+    `bot/data/profiles/<name>.json`; the filters, lemma cache and Telegram
+    sessions are shared by every profile of the process. `messages` translates
+    the runtime's own log lines (see utils.i18n) and is used for the first
+    profile only.
+    """
+
+    name: str
+    lead_template: str = LEAD_TEMPLATE
+    lead_template_no_link: str = LEAD_TEMPLATE_NO_LINK
+    digest_header: str = "📦 {count} leads"
+    forwarded_log: str = "Forwarded lead from: {title}"
+    true_words: FrozenSet[str] = frozenset()
+    messages: Dict[str, str] = field(default_factory=dict)
+    bot_token: str = ""
+    dest_chat_id: int = 0
+    groups_file: Optional[Path] = None
+    groups_ids_file: Optional[Path] = None
+    cleaned_usernames_file: Optional[Path] = None
+
+    @classmethod
+    def load(cls, name: str, directory: Path = PROFILES_DIR) -> "Profile":
+        data = json.loads((directory / f"{name}.json").read_text(encoding="utf-8"))
+        notification = data.get("notification", {})
+        log = data.get("log", {})
+        defaults = cls(name)
+        return cls(
+            name=name,
+            lead_template=notification.get("lead", defaults.lead_template),
+            lead_template_no_link=notification.get("lead_no_link", defaults.lead_template_no_link),
+            digest_header=notification.get("digest_header", defaults.digest_header),
+            forwarded_log=log.get("forwarded", defaults.forwarded_log),
+            true_words=frozenset(word.lower() for word in data.get("true_words", ())),
+            messages=data.get("messages", {}),
+        )
+
+    def notification(self, title: str, text: str, link: Optional[str]) -> str:
+        return build_notification(title, text, link, self.lead_template, self.lead_template_no_link)
@@ -0,0 +1,145 @@
+import sys
+from array import array
+from itertools import compress, count, repeat
+from types import MappingProxyType
+from typing import Callable, Dict, Iterable, List, Mapping, NamedTuple, Optional, Sequence, Tuple, Union
+
+# Index of a category that has not been seen yet: farther than any window
+_NEVER = -(1 << 30)
+
+# Smallest array type that holds one bit per category; up to 8 categories the states are plain bytes
+_TYPECODES = ((8, "B"), (16, "H"), (32, "L"), (64, "Q"))
+
+States = Union[bytes, array]
+
+
+class ProximityRule(NamedTuple):
+    """A `left` lemma within `window` tokens of a `right` one, in either order; None = the scan's window."""
+
+    name: str
+    left: str
+    right: str
+    window: Optional[int] = None
+
+
+class ProximityEngine:
+    """Checks several proximity rules in one pass, classifying lemmas through one frozen lemma -> bits vocabulary."""
+
+    def __init__(self, categories: Dict[str, Iterable[str]], rules: Sequence[ProximityRule] = ()):
+        self.bits: Dict[str, int] = {name: 1 << index for index, name in enumerate(categories)}
+        for size, typecode in _TYPECODES:
+            if len(self.bits) <= size:
+                self.typecode = typecode
+                break
+        else:
+            raise ValueError(f"At most {_TYPECODES[-1][0]} proximity categories, got {len(self.bits)}")
+        self._tags: Dict[str, int] = {}
+        for name, lemmas in categories.items():
+            for lemma in lemmas:
+                lemma = sys.intern(lemma)
+                self._tags[lemma] = self._tags.get(lemma, 0) | self.bits[name]
+        self.vocabulary: Mapping[str, int] = MappingProxyType(self._tags)
+        unknown = {side for rule in rules for side in (rule.left, rule.right)} - set(self.bits)
+        if unknown:
+            raise ValueError(f"Unknown proximity categories: {', '.join(sorted(unknown))}")
+        self.rules = list(rules)
+        self._rules = [
+            (1 << index, self.bits[rule.left], self.bits[rule.right], rule.window)
+            for index, rule in enumerate(self.rules)
+        ]
+        # (window, categories present) -> the rules that can fire, with their windows, and their bits
+        self._active: Dict[Tuple[int, int], Tuple[List[Tuple[int, int, int, int]], int]] = {}
+        self._values = sorted(set(self._tags.values()))
+        # Tag value -> the single-category bits it is made of
+        self._split = {bits: [bit for bit in self.bits.values() if bits & bit] for bits in set(self._tags.values())}
+
+    def bit(self, category: str) -> int:
+        return self.bits[category]
+
+    def rule_bit(self, name: str) -> int:
+        for index, rule in enumerate(self.rules):
+            if rule.name == name:
+                return 1 << index
+        raise KeyError(name)
+
+    def tag(self, lemmas: Iterable[str]) -> Tuple[int, States]:
+        """Returns (bits of every category present, the category bits of each lemma)."""
+        codes = map(self._tags.get, lemmas, repeat(0))
+        states = bytes(codes) if self.typecode == "B" else array(self.typecode, codes)
+        # A handful of distinct tag values, each found with one C-level search
+        present = 0
+        for bits in self._values:
+            if bits in states:
+                present |= bits
+        return present, states
+
+    def match(self, states: States, window: int, present: Optional[int] = None) -> int:
+        """Bitmask of the rules (see rule_bit) satisfied by a tag() result; `present` skips rules missing a side."""
+        rules, wanted = self._active_rules(window, present)
+        if not rules:
+            return 0
+        split = self._split
+        last: Dict[int, int] = {}
+        matched = 0
+        for index in compress(count(), states):
+            bits = states[index]
+            for bit, left, right, limit in rules:
+                if bits & left:
+                    if bits & right or index - last.get(right, _NEVER) <= limit:
+                        matched |= bit
+                elif bits & right and index - last.get(left, _NEVER) <= limit:
+                    matched |= bit
+            if matched == wanted:
+                break
+            for single in split[bits]:
+                last[single] = index
+        return matched
+
+    def scan(self, lemmas: Iterable[str], window: int) -> Tuple[int, int]:
+        """tag() and match() in one call: (categories present, rules matched)."""
+        present, states = self.tag(lemmas)
+        return present, self.match(states, window, present)
+
+    def walk(
+        self, lemmas: Iterable[str], window: int, stop: Optional[Callable[[int, int], bool]] = None
+    ) -> Tuple[int, int]:
+        """scan() without storing the lemmas; a True from `stop(present, matched)` after either grows ends the walk."""
+        rules, _ = self._active_rules(window, None)
+        tags = self._tags
+        split = self._split
+        last: Dict[int, int] = {}
+        present = matched = 0
+        for index, lemma in enumerate(lemmas):
+            bits = tags.get(lemma)
+            if not bits:
+                continue
+            grown = matched
+            for bit, left, right, limit in rules:
+                if bits & left:
+                    if bits & right or index - last.get(right, _NEVER) <= limit:
+                        matched |= bit
+                elif bits & right and index - last.get(left, _NEVER) <= limit:
+                    matched |= bit
+            if (bits | present != present or matched != grown) and stop is not None:
+                present |= bits
+                if stop(present, matched):
+                    break
+            present |= bits
+            for single in split[bits]:
+                last[single] = index
+        return present, matched
+
+    def _active_rules(self, window: int, present: Optional[int]) -> Tuple[List[Tuple[int, int, int, int]], int]:
+        key = (window, -1 if present is None else present)
+        active = self._active.get(key)
+        if active is None:
+            rules = [
+                (bit, left, right, window if own is None else own)
+                for bit, left, right, own in self._rules
+                if present is None or (present & left and present & right)
+            ]
+            active = (rules, sum(rule[0] for rule in rules))
+            # One entry per combination of categories seen; bounded in case there are many
+            if len(self._active) < 4096:
+                self._active[key] = active
+        return active
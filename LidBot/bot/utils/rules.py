@@ -0,0 +1,268 @@
+import json
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Mapping, NamedTuple, Optional, Sequence, Tuple
+
+from .cascade import FilterCascade, FilterStage
+from .matcher import KeywordMatcher
+from .proximity import ProximityEngine, ProximityRule
+
+DEFAULT_PATH = Path(__file__).resolve().parents[1] / "data" / "rules.json"
+
+Check = Callable[[Any], bool]
+# True or False once a rule's outcome can no longer change while lemmas stream in, None until then
+Settle = Callable[[Any], Optional[bool]]
+
+# Estimated cost of each leaf in dict/set lookups per message, for the compile report
+KEYWORD_COST = 1.0
+LEMMA_COST = 1.0
+# Per proximity rule and tagged lemma; the walk is shared by every `near` leaf of a message
+NEAR_COST = 2.0
+
+LEAVES = ("keyword", "lemma", "near", "check")
+OPERATORS = LEAVES + ("any", "all", "not")
+
+
+class _Node(NamedTuple):
+    check: Check
+    cost: float
+    lemmas: bool
+    text: str
+    # (kind, names, mode) for keyword/lemma/near leaves, so any/all can merge them
+    leaf: Optional[Tuple[str, Tuple[str, ...], str]] = None
+    # For nodes that read lemmas; the others are settled by `check` itself
+    settle: Optional[Settle] = None
+
+
+def _seen(check: Check) -> Settle:
+    """A lemma or proximity test only becomes true as more lemmas arrive, so only True is final."""
+    return lambda m: True if check(m) else None
+
+
+def _settle(node: _Node) -> Settle:
+    return node.settle or node.check
+
+
+def _negate(value: Optional[bool]) -> Optional[bool]:
+    return None if value is None else not value
+
+
+def _settle_any(settles: Sequence[Settle]) -> Settle:
+    def settle(message) -> Optional[bool]:
+        result: Optional[bool] = False
+        for part in settles:
+            value = part(message)
+            if value:
+                return True
+            if value is None:
+                result = None
+        return result
+
+    return settle
+
+
+def _settle_all(settles: Sequence[Settle]) -> Settle:
+    def settle(message) -> Optional[bool]:
+        result: Optional[bool] = True
+        for part in settles:
+            value = part(message)
+            if value is False:
+                return False
+            if value is None:
+                result = None
+        return result
+
+    return settle
+
+
+def read_rules(path: Path) -> Dict[str, Any]:
+    """The rules file as a dict: JSON, or YAML for a .yaml/.yml path (needs PyYAML)."""
+    text = path.read_text(encoding="utf-8")
+    if path.suffix.lower() in (".yaml", ".yml"):
+        try:
+            import yaml
+        except ImportError as exc:
+            raise ValueError(f"{path} is YAML, install PyYAML or use JSON") from exc
+        return yaml.safe_load(text) or {}
+    return json.loads(text)
+
+
+class RulePlan:
+    """A rules file compiled into lemma-free `filter_stages` and `lemma_stages`; no rejection means a pass."""
+
+    def __init__(
+        self,
+        rules: Mapping[str, Any],
+        lemmatize: Callable[[str], str],
+        tokenize: Callable[[str], Iterable[str]],
+        checks: Optional[Mapping[str, Tuple[Callable[[str], bool], float]]] = None,
+        source: Optional[Path] = None,
+    ):
+        if rules.get("version", 1) != 1:
+            raise ValueError(f"Unsupported rules version: {rules.get('version')}")
+        self.source = source
+        self.keywords: Dict[str, List[str]] = {name: list(words) for name, words in rules.get("keywords", {}).items()}
+        self.words: Dict[str, List[str]] = {name: list(words) for name, words in rules.get("lemmas", {}).items()}
+        self.lemmas = {name: {lemmatize(word) for word in words} for name, words in self.words.items()}
+        self.matcher = KeywordMatcher(self.keywords)
+        self.proximity = ProximityEngine(
+            self.lemmas,
+            [
+                ProximityRule(rule["name"], rule["left"], rule["right"], rule.get("window"))
+                for rule in rules.get("proximity", [])
+            ],
+        )
+        self._checks = dict(checks or {})
+        engine = self.proximity
+        self._report: List[Dict[str, Any]] = []
+        text_stages: List[FilterStage] = []
+        lemma_stages: List[FilterStage] = []
+        settles: List[Settle] = []
+        for rule in rules.get("reject", []):
+            name = rule.get("name")
+            if not name or "when" not in rule:
+                raise ValueError(f"Every reject rule needs a name and a `when`: {rule!r}")
+            if any(row["name"] == name for row in self._report):
+                raise ValueError(f"Duplicate rule name: {name}")
+            node = self._compile(rule["when"], name)
+            (lemma_stages if node.lemmas else text_stages).append(FilterStage(name, node.check))
+            if node.lemmas:
+                settles.append(_settle(node))
+            self._report.append(
+                {"name": name, "stage": "lemmas" if node.lemmas else "text", "cost": node.cost, "expression": node.text}
+            )
+
+        settled = _settle_any(settles)
+
+        def no_tokens(message) -> bool:
+            return next(iter(tokenize(message.lower)), None) is None
+
+        def lemmatize_message(message) -> bool:
+            # Read by the lemma rules; if the walk stops early they see what it has found so far
+            message.categories = message.matched = 0
+            if settled(message) is not None:
+                return False
+
+            def stop(present: int, matched: int) -> bool:
+                message.categories, message.matched = present, matched
+                return settled(message) is not None
+
+            lemmas: Iterable[str] = map(message.lemmatize or lemmatize, tokenize(message.lower))
+            message.categories, message.matched = engine.walk(lemmas, message.window, stop)
+            return False
+
+        self.filter_stages = FilterCascade(text_stages + [FilterStage("no_tokens", no_tokens)])
+        self.lemma_stages = FilterCascade([FilterStage("lemmas", lemmatize_message)] + lemma_stages)
+
+    def rejects(self, message) -> bool:
+        return self.filter_stages.rejects(message) or self.lemma_stages.rejects(message)
+
+    def stats(self) -> List[Dict[str, Any]]:
+        return self.filter_stages.stats() + self.lemma_stages.stats()
+
+    def report(self) -> List[Dict[str, Any]]:
+        """Per rule: name, stage (text or lemmas), estimated cost in lookups and the compiled expression."""
+        return [dict(row) for row in self._report]
+
+    def _compile(self, node: Any, rule: str) -> _Node:
+        if not isinstance(node, dict) or len(node) != 1 or next(iter(node)) not in OPERATORS:
+            raise ValueError(f"Rule {rule}: expected one of {', '.join(OPERATORS)}, got {node!r}")
+        (op, arg), = node.items()
+        if op == "not":
+            inner = self._compile(arg, rule)
+            check = inner.check
+            settle = None
+            if inner.lemmas:
+                inner_settle = _settle(inner)
+                settle = lambda m: _negate(inner_settle(m))
+            return _Node(lambda m: not check(m), inner.cost, inner.lemmas, f"not {inner.text}", settle=settle)
+        if op in ("any", "all"):
+            if not isinstance(arg, list) or not arg:
+                raise ValueError(f"Rule {rule}: `{op}` needs a non-empty list")
+            return self._combine(op, [self._compile(child, rule) for child in arg], rule)
+        names = (arg,) if isinstance(arg, str) else tuple(arg)
+        if not names or not all(isinstance(name, str) for name in names):
+            raise ValueError(f"Rule {rule}: `{op}` needs a name or a list of names")
+        if op == "check":
+            if len(names) != 1 or names[0] not in self._checks:
+                raise ValueError(f"Rule {rule}: unknown check {arg!r} (known: {', '.join(sorted(self._checks))})")
+            func, cost = self._checks[names[0]]
+            return _Node(lambda m: func(m.text), cost, False, f"check:{names[0]}")
+        return self._leaf(op, names, "any", rule)
+
+    def _combine(self, op: str, children: Sequence[_Node], rule: str) -> _Node:
+        groups: Dict[str, List[str]] = {}
+        parts: List[_Node] = []
+        for child in children:
+            if child.leaf is not None and (len(child.leaf[1]) == 1 or child.leaf[2] == op):
+                groups.setdefault(child.leaf[0], []).extend(child.leaf[1])
+            else:
+                parts.append(child)
+        for kind, names in groups.items():
+            parts.append(self._leaf(kind, tuple(dict.fromkeys(names)), op, rule))
+        if len(parts) == 1:
+            return parts[0]
+        # Pure checks, so evaluating the cheap ones first never changes the result
+        parts.sort(key=lambda part: part.cost)
+        checks = [part.check for part in parts]
+        first, second = checks[0], checks[1]
+        if op == "any":
+            check = (lambda m: first(m) or second(m)) if len(checks) == 2 else (lambda m: any(c(m) for c in checks))
+        else:
+            check = (lambda m: first(m) and second(m)) if len(checks) == 2 else (lambda m: all(c(m) for c in checks))
+        joiner = " or " if op == "any" else " and "
+        lemmas = any(part.lemmas for part in parts)
+        settle = None
+        if lemmas:
+            settles = [_settle(part) for part in parts]
+            settle = (_settle_any if op == "any" else _settle_all)(settles)
+        return _Node(
+            check,
+            sum(part.cost for part in parts),
+            lemmas,
+            "(" + joiner.join(part.text for part in parts) + ")",
+            settle=settle,
+        )
+
+    def _leaf(self, kind: str, names: Tuple[str, ...], mode: str, rule: str) -> _Node:
+        if kind == "keyword":
+            known = self.keywords
+        elif kind == "lemma":
+            known = self.proximity.bits
+        else:
+            known = {proximity_rule.name: proximity_rule for proximity_rule in self.proximity.rules}
+        unknown = [name for name in names if name not in known]
+        if unknown:
+            raise ValueError(f"Rule {rule}: unknown {kind} categories: {', '.join(unknown)}")
+        text = f"{kind}:{('|' if mode == 'any' else '&').join(names)}"
+        leaf = (kind, names, mode)
+
+        if kind == "keyword":
+            if len(names) == 1:
+                name = names[0]
+                check: Check = lambda m: name in m.hits
+            elif mode == "any":
+                wanted = frozenset(names)
+                check = lambda m: not wanted.isdisjoint(m.hits)
+            else:
+                wanted = frozenset(names)
+                check = lambda m: m.hits.keys() >= wanted
+            return _Node(check, KEYWORD_COST * len(names), False, text, leaf)
+
+        if kind == "lemma":
+            mask = 0
+            for name in names:
+                mask |= self.proximity.bit(name)
+            if mode == "any" or len(names) == 1:
+                check = lambda m: bool(m.categories & mask)
+            else:
+                check = lambda m: m.categories & mask == mask
+            return _Node(check, LEMMA_COST, True, text, leaf, _seen(check))
+
+        mask = 0
+        for name in names:
+            mask |= self.proximity.rule_bit(name)
+        if mode == "any" or len(names) == 1:
+            check = lambda m: bool(m.matched & mask)
+        else:
+            check = lambda m: m.matched & mask == mask
+        return _Node(check, NEAR_COST * len(self.proximity.rules), True, text, leaf, _seen(check))
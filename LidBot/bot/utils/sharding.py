@@ -0,0 +1,134 @@
+import bisect
+import hashlib
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Collection, Dict, Hashable, Iterable, List, Optional, Sequence, Set, Tuple
+
+from telethon.utils import get_peer_id
+
+from .chat_watcher import ChatSet
+from .files import write_atomic
+
+
+def _hash(key: str) -> int:
+    return int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+class HashRing:
+    """
+    Consistent hashing over shard names with `replicas` virtual nodes per
+    shard: adding or removing a shard only moves the keys that belonged to
+    it instead of reshuffling every chat.
+    """
+
+    def __init__(self, nodes: Sequence[str], replicas: int = 100):
+        if not nodes:
+            raise ValueError("HashRing needs at least one node")
+        self.nodes = list(nodes)
+        points = sorted((_hash(f"{node}#{i}"), node) for node in self.nodes for i in range(replicas))
+        self._keys = [point for point, _ in points]
+        self._owners = [node for _, node in points]
+
+    def node_for(self, key: Hashable, among: Optional[Collection[str]] = None) -> str:
+        """The owner of `key`; with `among`, the first of those nodes clockwise from it."""
+        index = bisect.bisect(self._keys, _hash(str(key)))
+        for step in range(len(self._keys)):
+            owner = self._owners[(index + step) % len(self._keys)]
+            if among is None or owner in among:
+                return owner
+        raise ValueError("HashRing has none of the given nodes")
+
+
+class ShardedChats:
+    """
+    Splits the monitored chats between shards (one per session) on a hash
+    ring; each shard's handler only accepts the chats assigned to it. An
+    account only gets updates from chats it is in, so once set_visible()
+    has told which chats a shard's account is in, a chat goes to one of
+    the shards that see it. Chats no account is in (`unreachable`) are
+    spread over all shards and get no live updates.
+    """
+
+    def __init__(self, shards: Sequence[str], replicas: int = 100):
+        self.ring = HashRing(shards, replicas)
+        self.sets: Dict[str, ChatSet] = {name: ChatSet() for name in shards}
+        # Chat IDs each shard's account is in; None means unknown and takes any chat
+        self.visible: Dict[str, Optional[Set[int]]] = {name: None for name in shards}
+        self.unreachable: Set[int] = set()
+
+    def __len__(self) -> int:
+        return sum(len(chat_set) for chat_set in self.sets.values())
+
+    def set_visible(self, shard: str, chat_ids: Optional[Iterable[int]]) -> None:
+        """Record the chats `shard`'s account is in (None if unknown); applies from the next replace()."""
+        self.visible[shard] = None if chat_ids is None else set(chat_ids)
+
+    def owner(self, chat_id: int) -> str:
+        seeing = [name for name, ids in self.visible.items() if ids is None or chat_id in ids]
+        return self.ring.node_for(chat_id, seeing or None)
+
+    def partition(self, chats: Iterable) -> Dict[str, List]:
+        parts: Dict[str, List] = {name: [] for name in self.sets}
+        for chat in chats:
+            try:
+                parts[self.owner(get_peer_id(chat))].append(chat)
+            except (TypeError, ValueError):
+                pass
+        return parts
+
+    def replace(self, chats: Iterable) -> Tuple[Set[int], Set[int]]:
+        """Re-partition the chat list; returns (added, removed) IDs over all shards."""
+        before = set().union(*(chat_set.ids for chat_set in self.sets.values()))
+        for name, part in self.partition(chats).items():
+            self.sets[name].replace(part)
+        after = set().union(*(chat_set.ids for chat_set in self.sets.values()))
+        self.unreachable = {
+            chat_id for chat_id in after if not any(ids is None or chat_id in ids for ids in self.visible.values())
+        }
+        return after - before, before - after
+
+    def assignment(self) -> Dict[int, str]:
+        """Chat ID -> the shard that monitors it."""
+        return {chat_id: name for name, chat_set in self.sets.items() for chat_id in chat_set.ids}
+
+    def write_assignment(self, path: Path, name_of: Callable[[int], str]) -> None:
+        """
+        A tab-separated table of chat -> session, chats no account is in
+        first; `joined` tells if the session's account is in the chat.
+        `name_of` gives the chat's @username or title.
+        """
+        rows = sorted(self.assignment().items(), key=lambda row: (row[0] not in self.unreachable, row[1], row[0]))
+        lines = ["session\tchat_id\tchat\tjoined"]
+        for chat_id, name in rows:
+            visible = self.visible[name]
+            joined = "unknown" if visible is None else "yes" if chat_id in visible else "no"
+            lines.append("\t".join((name, str(chat_id), name_of(chat_id), joined)))
+        write_atomic(path, "\n".join(lines) + "\n")
+
+    def accepts(self, shard: str) -> Callable[[object], bool]:
+        chat_set = self.sets[shard]
+        return lambda event: event.chat_id in chat_set
+
+
+async def dialog_ids(client) -> Set[int]:
+    """Marked IDs of every chat the client's account is in, archived ones included."""
+    return {dialog.id async for dialog in client.iter_dialogs()}
+
+
+class SeenSet:
+    """Bounded set of recently seen keys, oldest forgotten first."""
+
+    def __init__(self, maxsize: int = 10000):
+        self.maxsize = max(1, maxsize)
+        self.duplicates = 0
+        self._keys: "OrderedDict[Hashable, None]" = OrderedDict()
+
+    def add(self, key: Hashable) -> bool:
+        """Remember `key`; returns False if it was already seen."""
+        if key in self._keys:
+            self.duplicates += 1
+            return False
+        self._keys[key] = None
+        if len(self._keys) > self.maxsize:
+            self._keys.popitem(last=False)
+        return True
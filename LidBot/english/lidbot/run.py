@@ -0,0 +1,22 @@
+"""
+Starts the shared LidBot runtime (LidBot/bot) for this folder: the English
+profile, chat lists and state in ./data, Telethon session files next to this
+script. Environment variables still override everything, LIDBOT_HOME and
+PROFILES included.
+
+    python run.py
+"""
+
+import os
+import runpy
+import sys
+from pathlib import Path
+
+HOME = Path(__file__).resolve().parent
+
+if __name__ == "__main__":
+    os.environ.setdefault("LIDBOT_HOME", str(HOME))
+    os.environ.setdefault("PROFILES", "en")
+    os.chdir(os.environ["LIDBOT_HOME"])
+    sys.path.insert(0, str(HOME.parents[1]))
+    runpy.run_module("bot.main", run_name="__main__", alter_sys=True)
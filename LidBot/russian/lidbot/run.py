@@ -0,0 +1,21 @@
+"""
+Запускает общий рантайм LidBot (LidBot/bot) для этой папки: русский профиль,
+списки чатов и состояние в ./data, файлы сессий Telethon рядом со скриптом.
+Переменные окружения по-прежнему важнее, в том числе LIDBOT_HOME и PROFILES.
+
+    python run.py
+"""
+
+import os
+import runpy
+import sys
+from pathlib import Path
+
+HOME = Path(__file__).resolve().parent
+
+if __name__ == "__main__":
+    os.environ.setdefault("LIDBOT_HOME", str(HOME))
+    os.environ.setdefault("PROFILES", "ru")
+    os.chdir(os.environ["LIDBOT_HOME"])
+    sys.path.insert(0, str(HOME.parents[1]))
+    runpy.run_module("bot.main", run_name="__main__", alter_sys=True)
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# The shared bot package sits next to this folder
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
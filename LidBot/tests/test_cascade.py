@@ -0,0 +1,24 @@
+from bot.utils.cascade import FilterCascade, FilterStage
+
+
+def test_reorder_uses_rates_measured_with_every_stage():
+    # "first" rejects the same items as "broad", so in order it shadows it completely
+    first = FilterStage("first", lambda n: n % 2 == 0)
+    broad = FilterStage("broad", lambda n: n % 4 != 1)
+    cascade = FilterCascade([first, broad], adaptive=True, reorder_every=10_000, sample_every=2)
+    for n in range(1000):
+        assert cascade.rejects(n) == (n % 2 == 0 or n % 4 != 1)
+    assert broad.sampled_rejection_rate > first.sampled_rejection_rate
+    for stage in (first, broad):
+        stage.timed_seconds, stage.timed_calls = 1.0, 1
+    cascade.reorder()
+    assert [stage.name for stage in cascade.stages] == ["broad", "first"]
+
+
+def test_verdicts_do_not_depend_on_adaptive():
+    def stages():
+        return [FilterStage("three", lambda n: n % 3 == 0), FilterStage("five", lambda n: n % 5 == 0)]
+
+    plain = FilterCascade(stages())
+    adaptive = FilterCascade(stages(), adaptive=True, reorder_every=7, sample_every=3)
+    assert [plain.rejects(n) for n in range(500)] == [adaptive.rejects(n) for n in range(500)]
@@ -0,0 +1,95 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+from telethon.errors import FloodWaitError
+from telethon.tl.types import InputPeerChannel
+from telethon.utils import get_peer_id
+
+from bot.utils.catchup import LastSeenStore, catch_up
+
+NOW = datetime.now(timezone.utc)
+
+
+class HistoryClient:
+    """Every chat's history runs up to message `top`, one message a minute; `flood` chats FloodWait once."""
+
+    def __init__(self, top: int = 1000, access_hash: int = 1, flood=(), broken=()):
+        self.top = top
+        self.access_hash = access_hash
+        self.flood = set(flood)
+        self.broken = set(broken)
+        self.reads = []
+
+    async def get_input_entity(self, chat_id):
+        return InputPeerChannel(-chat_id - 1000000000000, self.access_hash)
+
+    async def iter_messages(self, chat, limit=None, min_id=0, max_id=0):
+        assert chat.access_hash == self.access_hash
+        chat_id = get_peer_id(chat)
+        self.reads.append((chat_id, min_id, max_id))
+        if chat_id in self.broken:
+            raise RuntimeError("CHANNEL_PRIVATE")
+        if chat_id in self.flood:
+            self.flood.discard(chat_id)
+            raise FloodWaitError(request=None, capture=0)
+        top = max_id - 1 if max_id else self.top
+        for count, message_id in enumerate(range(top, min_id, -1)):
+            if limit is not None and count >= limit:
+                break
+            yield SimpleNamespace(chat_id=chat_id, id=message_id, date=NOW - timedelta(minutes=self.top - message_id))
+
+
+CHATS = [InputPeerChannel(channel_id, 1) for channel_id in range(1, 6)]
+IDS = [get_peer_id(chat) for chat in CHATS]
+
+
+def run(client, last_ids, **kwargs):
+    got = []
+    recorded = {}
+
+    async def submit(message):
+        got.append((message.chat_id, message.id))
+
+    stats = asyncio.run(
+        catch_up(client, CHATS, last_ids, submit, recorded.__setitem__, rate=1000, limit=100, **kwargs)
+    )
+    return stats, got, recorded
+
+
+def test_gap_is_read_oldest_first_and_new_chats_only_recorded():
+    stats, got, recorded = run(HistoryClient(), {IDS[0]: 990, IDS[1]: 500})
+    assert [message_id for chat_id, message_id in got if chat_id == IDS[0]] == list(range(991, 1001))
+    # At most `limit` of the newest messages
+    assert [message_id for chat_id, message_id in got if chat_id == IDS[1]] == list(range(901, 1001))
+    assert recorded == {chat_id: 1000 for chat_id in IDS[2:]}
+    assert stats["new_chats"] == 3 and stats["failed"] == 0
+
+
+def test_catch_up_stops_below_the_first_live_id():
+    _, got, _ = run(HistoryClient(), {IDS[0]: 990}, live_ids={IDS[0]: 995})
+    assert [message_id for _, message_id in got] == [991, 992, 993, 994]
+
+
+def test_own_peers_replace_the_access_hash():
+    client = HistoryClient(access_hash=99)
+    stats, got, _ = run(client, {IDS[0]: 995}, own_peers=True)
+    assert stats["failed"] == 0 and len(got) == 5
+
+
+def test_flood_wait_retries_and_failures_are_logged(capsys):
+    client = HistoryClient(flood={IDS[0]}, broken={IDS[1]})
+    stats, got, _ = run(client, {IDS[0]: 995, IDS[1]: 995})
+    assert len(got) == 5
+    assert stats["failed"] == 1
+    assert f"{IDS[1]}" in capsys.readouterr().out
+
+
+def test_last_seen_store_only_raises_ids(tmp_path):
+    store = LastSeenStore(tmp_path / "last_seen.json")
+    store.update(IDS[0], 10)
+    store.update(IDS[0], 5)
+    assert store.save()
+    assert not store.save()
+    loaded = LastSeenStore(tmp_path / "last_seen.json")
+    assert loaded.load() == 1 and loaded.get(IDS[0]) == 10
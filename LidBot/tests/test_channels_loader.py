@@ -0,0 +1,91 @@
+import asyncio
+import time
+
+from telethon.errors import FloodWaitError, UsernameNotOccupiedError
+from telethon.tl.types import InputPeerChannel
+
+from bot.utils.channels_loader import load_target_chats, resolve_usernames
+
+
+class FakeClient:
+    """
+    Resolves `chan<N>` usernames after `latency` seconds. `flood<N>` answers
+    with a FloodWait of `flood_seconds` the first time, `hugeflood` always
+    with a long one and `free<N>` as an unoccupied username.
+    """
+
+    def __init__(self, latency: float = 0.02, flood_seconds: int = 1):
+        self.latency = latency
+        self.flood_seconds = flood_seconds
+        self.calls = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.flooded = set()
+
+    async def get_input_entity(self, username):
+        self.calls.append((time.monotonic(), username))
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.latency)
+            if username == "hugeflood":
+                raise FloodWaitError(request=None, capture=5000)
+            if username.startswith("flood") and username not in self.flooded:
+                self.flooded.add(username)
+                raise FloodWaitError(request=None, capture=self.flood_seconds)
+            if username.startswith("free"):
+                raise UsernameNotOccupiedError(request=None)
+            return InputPeerChannel(int("".join(filter(str.isdigit, username)) or 0) + 1, 42)
+        finally:
+            self.in_flight -= 1
+
+
+def test_resolve_keeps_order_and_bounds_concurrency():
+    client = FakeClient()
+    usernames = [f"chan{i}" for i in range(40)]
+    progress = []
+    results = asyncio.run(
+        resolve_usernames(client, usernames, concurrency=4, rate=1000, progress=lambda done, _: progress.append(done))
+    )
+    assert [username for username, _, _ in results] == usernames
+    assert all(error is None for _, _, error in results)
+    assert client.max_in_flight <= 4
+    assert progress[-1] == 40
+
+
+def test_flood_wait_pauses_every_worker_and_retries():
+    client = FakeClient(flood_seconds=1)
+    usernames = ["flood1"] + [f"chan{i}" for i in range(20)]
+    started = time.monotonic()
+    results = asyncio.run(resolve_usernames(client, usernames, concurrency=4, rate=1000, max_flood_wait=60))
+    assert all(error is None for _, _, error in results)
+    assert [username for _, username in client.calls].count("flood1") == 2
+    # Nothing is sent while the FloodWait lasts
+    flood_at = client.calls[0][0] + client.latency
+    assert not [at for at, _ in client.calls if flood_at + 0.05 < at < flood_at + 0.95]
+    assert time.monotonic() - started >= 1.0
+
+
+def test_long_flood_wait_gives_up():
+    client = FakeClient()
+    results = asyncio.run(resolve_usernames(client, ["hugeflood", "chan1"], max_flood_wait=60))
+    assert isinstance(results[0][2], FloodWaitError)
+    assert results[1][2] is None
+
+
+def test_load_target_chats_caches_resolved_ids(tmp_path):
+    groups = tmp_path / "all_channels.txt"
+    groups.write_text("@chan1\nhttps://t.me/chan2\nfree1\n", encoding="utf-8")
+    ids = tmp_path / "channel_ids_cache.txt"
+    cleaned = tmp_path / "active_channels_usernames.txt"
+
+    client = FakeClient()
+    chats, _ = asyncio.run(load_target_chats(client, groups, ids, cleaned, True, 50, rate=1000))
+    assert [chat.channel_id for chat in chats] == [2, 3]
+    assert cleaned.read_text(encoding="utf-8").split() == ["@chan1", "@chan2"]
+
+    # Fresh cache entries, found or not, are not resolved again
+    again = FakeClient()
+    chats, _ = asyncio.run(load_target_chats(again, groups, ids, cleaned, True, 50, rate=1000))
+    assert again.calls == []
+    assert [(chat.channel_id, chat.access_hash) for chat in chats] == [(2, 42), (3, 42)]
@@ -0,0 +1,15 @@
+from bot.utils.files import write_atomic
+
+
+def test_write_atomic_replaces_the_file(tmp_path):
+    path = tmp_path / "state" / "last_seen.json"
+    write_atomic(path, "first")
+    write_atomic(path, b"second")
+    assert path.read_bytes() == b"second"
+    assert [entry.name for entry in path.parent.iterdir()] == ["last_seen.json"]
+
+
+def test_write_atomic_keeps_text_as_utf8(tmp_path):
+    path = tmp_path / "report.tsv"
+    write_atomic(path, "чат\tchat\n")
+    assert path.read_bytes() == "чат\tchat\n".encode("utf-8")
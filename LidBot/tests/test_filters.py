@@ -0,0 +1,66 @@
+import random
+
+import pytest
+
+from bot.utils import filters
+
+# Verdicts under the default rules.json
+LEADS = [
+    "Ищу авто напрокат в Дубае с 1 по 10 число",
+    "Need a car for rent for a week. Who can help?",
+    "Хочу взять машину в аренду на месяц, желательно кроссовер",
+]
+OTHERS = [
+    "Сдаю авто в аренду, звоните в whatsapp",
+    "Всем привет! Подскажите, где лучше поменять валюту в Марине?",
+    "Looking for a nice studio in JVC, budget 5k per month",
+    "Продам детские игрушки, почти новые, самовывоз из Дейры",
+    "Еду из Шарджи в Дубай завтра утром, могу забрать попутчиков",
+    "Good morning everyone, any recommendations for a dentist near Business Bay?",
+    "Rent a car https://example.com/cars +971 50 123 4567",
+    "",
+]
+# Checked against each other only
+MIXED = [
+    "Нужна машина в аренду на неделю, кто может подсказать?",
+    "НУЖНА МАШИНА В АРЕНДУ!!! Кто сдаёт?",
+    "Need a car for rent. Not a seller, please no agents",
+]
+CYRILLIC = "абвгдежзиклмнопрстуфхцчшэюя"
+ENDINGS = ["", "а", "ы", "ой", "ами", "ение", "ать", "ить", "ет", "ут", "ый", "ая"]
+
+
+def long_message(rng: random.Random, words: int) -> str:
+    """A lead-like opening followed by words the lemmatizer has to work through."""
+    tokens = []
+    for _ in range(words):
+        if rng.random() < 0.2:
+            tokens.append(rng.choice(rng.choice(LEADS + OTHERS[:-1]).split()))
+        else:
+            tokens.append("".join(rng.choice(CYRILLIC) for _ in range(rng.randint(3, 8))) + rng.choice(ENDINGS))
+    return "Нужна машина " + " ".join(tokens)
+
+
+@pytest.fixture(scope="module")
+def texts():
+    rng = random.Random(1)
+    return LEADS + OTHERS + MIXED + [long_message(rng, rng.randint(5, 60)) for _ in range(300)]
+
+
+def test_sample_verdicts():
+    filters.configure_lemma_cache(20000, None)
+    assert all(filters.passes_filters(text, 3) for text in LEADS)
+    assert not any(filters.passes_filters(text, 3) for text in OTHERS)
+
+
+@pytest.mark.parametrize("batch_size", [1, 7, 32, 1000])
+def test_batch_verdicts_match_single(texts, batch_size):
+    filters.configure_lemma_cache(20000, None)
+    single = [filters.passes_filters(text, 3) for text in texts]
+    # The batch path shares lemma lookups between messages; it has to start cold to be compared fairly
+    filters.configure_lemma_cache(20000, None)
+    batched = []
+    for start in range(0, len(texts), batch_size):
+        batched.extend(filters.passes_filters_batch(texts[start:start + batch_size], 3))
+    assert batched == single
+    assert any(single) and not all(single)
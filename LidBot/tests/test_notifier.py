@@ -0,0 +1,105 @@
+import asyncio
+import time
+
+import pytest
+from aiohttp import web
+
+from bot.utils import notifier
+
+# Every sendMessage takes this long on the fake Bot API
+SEND_SECONDS = 0.3
+
+
+class FakeClient:
+    """Stands in for the Telethon client: records what the Saved Messages fallback sends."""
+
+    def __init__(self):
+        self.sent = []
+
+    async def send_message(self, to, message, parse_mode=None):
+        self.sent.append(message)
+
+
+async def start_bot_api(calls):
+    async def send_message(request):
+        body = await request.json()
+        calls.append(body)
+        await asyncio.sleep(SEND_SECONDS)
+        if body["text"] == "flood":
+            return web.json_response({"ok": False, "parameters": {"retry_after": 7}}, status=429)
+        if body["text"] == "broken":
+            return web.json_response({"ok": False}, status=500)
+        return web.json_response({"ok": True})
+
+    app = web.Application()
+    app.router.add_post("/bot{token}/sendMessage", send_message)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    host, port = runner.addresses[0][:2]
+    return runner, f"http://{host}:{port}"
+
+
+async def measure_lag(stop: asyncio.Event, lags) -> None:
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(0.01)
+        lags.append(time.perf_counter() - started - 0.01)
+
+
+def test_slow_bot_api_does_not_block_the_loop():
+    async def run():
+        calls, lags = [], []
+        runner, url = await start_bot_api(calls)
+        stop = asyncio.Event()
+        ticker = asyncio.create_task(measure_lag(stop, lags))
+        client = FakeClient()
+        started = time.perf_counter()
+        try:
+            await asyncio.gather(*(notifier.notify(client, f"lead {i}", "token", 1, url) for i in range(20)))
+            elapsed = time.perf_counter() - started
+        finally:
+            stop.set()
+            await ticker
+            await notifier.close_notifier()
+            await runner.cleanup()
+        return calls, lags, client, elapsed
+
+    calls, lags, client, elapsed = asyncio.run(run())
+    assert len(calls) == 20
+    assert client.sent == []
+    # Sent concurrently over the pooled session, not one after another
+    assert elapsed < 20 * SEND_SECONDS / 2
+    assert max(lags) < 0.1
+
+
+def test_rate_limit_raises_retry_after():
+    async def run():
+        calls = []
+        runner, url = await start_bot_api(calls)
+        client = FakeClient()
+        try:
+            await notifier.notify(client, "flood", "token", 1, url)
+        finally:
+            await notifier.close_notifier()
+            await runner.cleanup()
+
+    with pytest.raises(notifier.RetryAfter) as raised:
+        asyncio.run(run())
+    assert raised.value.seconds == 7
+
+
+def test_failed_send_falls_back_to_saved_messages():
+    async def run():
+        calls = []
+        runner, url = await start_bot_api(calls)
+        client = FakeClient()
+        try:
+            await notifier.notify(client, "broken", "token", 1, url)
+        finally:
+            await notifier.close_notifier()
+            await runner.cleanup()
+        return client
+
+    assert asyncio.run(run()).sent == ["broken"]
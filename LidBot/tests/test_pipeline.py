@@ -0,0 +1,43 @@
+import asyncio
+
+from bot.utils.pipeline import Pipeline, Stage
+
+
+def run(stages, items):
+    errors = []
+
+    async def main():
+        pipeline = Pipeline(stages, on_error=lambda stage, exc: errors.append((stage, str(exc))))
+        for item in items:
+            await pipeline.submit(item)
+        pipeline.start()
+        await pipeline.join()
+        await pipeline.stop()
+        return pipeline.stats()
+
+    return asyncio.run(main()), errors
+
+
+def test_items_flow_in_order_and_none_drops():
+    out = []
+    stats, errors = run([Stage("odd", lambda n: n if n % 2 else None), Stage("sink", out.append)], range(10))
+    assert out == [1, 3, 5, 7, 9]
+    assert stats[0]["dropped"] == 5 and stats[0]["errors"] == 0
+    assert stats[0]["wait_count"] == stats[0]["run_count"] == 10
+    assert stats[0]["run_sum"] > 0
+    assert not errors
+
+
+def test_failing_batch_only_loses_the_failing_item():
+    def keep_odd(numbers):
+        if 4 in numbers:
+            raise ValueError("bad item")
+        return [n if n % 2 else None for n in numbers]
+
+    out = []
+    stats, errors = run([Stage("filter", keep_odd, batch_size=32), Stage("sink", out.append)], range(10))
+    assert out == [1, 3, 5, 7, 9]
+    # The failing item is an error, not a filtered one
+    assert stats[0]["errors"] == 1
+    assert stats[0]["dropped"] == 4
+    assert errors == [("filter", "bad item")]
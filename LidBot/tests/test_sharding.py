@@ -0,0 +1,88 @@
+import asyncio
+from types import SimpleNamespace
+
+from telethon.tl.types import InputPeerChannel
+from telethon.utils import get_peer_id
+
+from bot.utils.sharding import HashRing, SeenSet, ShardedChats, dialog_ids
+
+CHATS = [InputPeerChannel(channel_id, 1) for channel_id in range(1, 301)]
+IDS = [get_peer_id(chat) for chat in CHATS]
+
+
+class StubClient:
+    """An account that is in `chat_ids`: iter_dialogs yields them like Telethon's Dialog objects."""
+
+    def __init__(self, chat_ids):
+        self.chat_ids = list(chat_ids)
+
+    async def iter_dialogs(self):
+        for chat_id in self.chat_ids:
+            yield SimpleNamespace(id=chat_id)
+
+
+def sharded(clients) -> ShardedChats:
+    monitored = ShardedChats(list(clients))
+
+    async def find_visible():
+        for name, client in clients.items():
+            monitored.set_visible(name, await dialog_ids(client))
+
+    asyncio.run(find_visible())
+    monitored.replace(CHATS)
+    return monitored
+
+
+def test_every_chat_has_exactly_one_shard():
+    monitored = ShardedChats(["a", "b", "c"])
+    added, removed = monitored.replace(CHATS)
+    assert added == set(IDS) and not removed
+    accepts = {name: monitored.accepts(name) for name in "abc"}
+    for chat_id in IDS:
+        event = SimpleNamespace(chat_id=chat_id)
+        assert sum(accepts[name](event) for name in "abc") == 1
+    assert all(len(chat_set) > 50 for chat_set in monitored.sets.values())
+
+
+def test_adding_a_shard_moves_only_its_share():
+    before = HashRing(["a", "b", "c"])
+    after = HashRing(["a", "b", "c", "d"])
+    moved = [chat_id for chat_id in IDS if before.node_for(chat_id) != after.node_for(chat_id)]
+    assert all(after.node_for(chat_id) == "d" for chat_id in moved)
+    assert len(moved) < len(IDS) / 2
+
+
+def test_chats_go_to_an_account_that_is_in_them():
+    clients = {"a": StubClient(IDS[:120]), "b": StubClient(IDS[80:250])}
+    monitored = sharded(clients)
+    for name, chat_set in monitored.sets.items():
+        reachable = chat_set.ids - monitored.unreachable
+        assert all(chat_id in clients[name].chat_ids for chat_id in reachable)
+    assert monitored.unreachable == set(IDS[250:])
+    assert len(monitored) == len(IDS)
+
+
+def test_unknown_dialogs_take_any_chat():
+    monitored = ShardedChats(["a", "b"])
+    monitored.set_visible("a", IDS[:10])
+    monitored.replace(CHATS)
+    assert monitored.sets["b"].ids >= set(IDS[10:])
+    assert not monitored.unreachable
+
+
+def test_assignment_is_saved(tmp_path):
+    monitored = sharded({"a": StubClient(IDS[:150]), "b": StubClient(IDS[150:290])})
+    path = tmp_path / "shards.tsv"
+    monitored.write_assignment(path, lambda chat_id: f"chat {chat_id}")
+    header, *rows = [line.split("\t") for line in path.read_text(encoding="utf-8").splitlines()]
+    assert header == ["session", "chat_id", "chat", "joined"]
+    assert len(rows) == len(IDS)
+    # Chats no account is in come first
+    assert [row[3] for row in rows[:10]] == ["no"] * 10
+    assert {int(row[1]): row[0] for row in rows} == monitored.assignment()
+
+
+def test_seen_set_forgets_the_oldest_keys():
+    seen = SeenSet(3)
+    assert [seen.add(key) for key in (1, 2, 1, 3, 4, 1)] == [True, True, False, True, True, True]
+    assert seen.duplicates == 1